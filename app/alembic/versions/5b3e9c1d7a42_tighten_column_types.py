@@ -0,0 +1,82 @@
+"""Tighten column types
+
+Revision ID: 5b3e9c1d7a42
+Revises: eb22a058c4c9
+Create Date: 2026-10-16 10:12:40.511203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b3e9c1d7a42'
+down_revision = 'eb22a058c4c9'
+branch_labels = None
+depends_on = None
+
+# (table, column, old length, new length)
+VARCHAR_RESIZES = [
+    ('sources_record', 'url', 10000, 2048),
+    ('sources_record', 'filename', 10000, 1024),
+    ('sources_record', 'bytehash', 10000, 128),
+    ('sources_record', 'source_filename', 10000, 1024),
+    ('doc_metadata_record', 'url', 10000, 2048),
+    ('doc_metadata_record', 'filename', 10000, 1024),
+    ('page_metadata_record', 'page_id', 10000, 1024),
+    ('page_metadata_record', 'url', 10000, 2048),
+]
+
+# (table, column)
+TIMESTAMP_COLUMNS = [
+    ('sources_record', 'last_modified'),
+    ('doc_metadata_record', 'core_created'),
+    ('doc_metadata_record', 'core_last_printed'),
+    ('doc_metadata_record', 'core_modified'),
+]
+
+
+def upgrade() -> None:
+    for table, column, old_length, new_length in VARCHAR_RESIZES:
+        op.alter_column(table, column,
+                        existing_type=sa.VARCHAR(length=old_length),
+                        type_=sa.String(length=new_length))
+
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column,
+                        existing_type=sa.DateTime(),
+                        type_=sa.DateTime(timezone=True),
+                        existing_nullable=True)
+
+    op.alter_column('sources_record', 'status_code',
+                    existing_type=sa.VARCHAR(length=200),
+                    type_=sa.SmallInteger(),
+                    existing_nullable=True,
+                    postgresql_using='status_code::smallint')
+    op.alter_column('sources_record', 'olet_pass',
+                    existing_type=sa.VARCHAR(length=200),
+                    type_=sa.Boolean(),
+                    existing_nullable=True,
+                    postgresql_using='olet_pass::boolean')
+
+
+def downgrade() -> None:
+    op.alter_column('sources_record', 'olet_pass',
+                    existing_type=sa.Boolean(),
+                    type_=sa.VARCHAR(length=200),
+                    existing_nullable=True)
+    op.alter_column('sources_record', 'status_code',
+                    existing_type=sa.SmallInteger(),
+                    type_=sa.VARCHAR(length=200),
+                    existing_nullable=True)
+
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column,
+                        existing_type=sa.DateTime(timezone=True),
+                        type_=sa.DateTime(),
+                        existing_nullable=True)
+
+    for table, column, old_length, new_length in VARCHAR_RESIZES:
+        op.alter_column(table, column,
+                        existing_type=sa.String(length=new_length),
+                        type_=sa.VARCHAR(length=old_length))
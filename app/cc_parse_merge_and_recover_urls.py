@@ -6,9 +6,11 @@ Util used after downloading one URL-Batch from CC
 """
 
 import argparse
-import pandas as pd
+import concurrent.futures
 from pathlib import Path
+import re
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 import time
 
@@ -16,6 +18,10 @@ import settings
 from src.cc_processing.preprocess_cc_urls import process_urls
 
 BASE_URL = "https://data.commoncrawl.org/"
+MAX_READ_WORKERS = 8
+
+# matches either the segment being fetched, or a successful fetch
+LOG_LINE_PATTERN = re.compile(r'Fetching (\S+)|Success! got URL list')
 
 
 def main():
@@ -47,22 +53,33 @@ def main():
 
     pdir = Path(args.input)
     pqfiles = [i for i in pdir.glob('*.parquet')]
+    # read the parquets concurrently; arrow releases the GIL while reading
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=MAX_READ_WORKERS
+    ) as executor:
+        pqtabs = list(executor.map(pq.read_table, pqfiles))
+
     with pq.ParquetWriter(str(pdir / (args.cc_dump + "_merged_raw.parquet")),
                           schema=pa.schema([('url', pa.string())])) as writer:
-        for item in pqfiles:
-            pqtab = pq.read_table(item)
-            # some parquets may be empty (no docx urls in segment)
-            if pqtab.schema.equals(writer.schema):
-                writer.write_table(pq.read_table(item))
+        # some parquets may be empty (no docx urls in segment)
+        pqtabs = [t for t in pqtabs if t.schema.equals(writer.schema)]
+        if len(pqtabs) > 0:
+            writer.write_table(pa.concat_tables(pqtabs))
+    del pqtabs
 
     time.sleep(5)
 
-    # deduplicate parquet
-    df = pd.read_parquet(str(pdir / (args.cc_dump + "_merged_raw.parquet")))
-    num_undupe_rows = len(df)
-    df = df.drop_duplicates()
-    num_rows = len(df)
-    df.to_parquet(str(pdir / (args.cc_dump + "_merged.parquet")))
+    # deduplicate parquet; arrow hashes the string buffers natively and keeps
+    # the first occurrence of each url, same as pandas.drop_duplicates
+    urls = pq.read_table(
+        str(pdir / (args.cc_dump + "_merged_raw.parquet")), columns=['url']
+    ).column('url')
+    num_undupe_rows = len(urls)
+    urls = pc.unique(urls)
+    num_rows = len(urls)
+    pq.write_table(pa.table({'url': urls}),
+                   str(pdir / (args.cc_dump + "_merged.parquet")))
+    del urls
 
     print("total unique URLs: " + str(num_rows) + " removed " + str(
         num_undupe_rows - num_rows) + " duplicates")
@@ -77,18 +94,21 @@ def main():
                 needed_segments.append(line.strip())
 
     logfiles = [i for i in pdir.glob('worker_log_*')]
-    gotten_segments = []
+    gotten_segments = set()
     for item in logfiles:
         with open(item) as file:
             last_seen_seg = ''
             for line in file:
-                if 'Fetching ' in line:
-                    last_seen_seg = line.split('Fetching ')[-1].strip()
-                if 'Success! got URL list' in line:
-                    gotten_segments.append(last_seen_seg)
-
-    missed_segments = [x for x in needed_segments if
-                       ((BASE_URL + x) not in gotten_segments)]
+                match = LOG_LINE_PATTERN.search(line)
+                if match is None:
+                    continue
+                if match.group(1) is not None:
+                    last_seen_seg = match.group(1)
+                else:
+                    gotten_segments.add(last_seen_seg.removeprefix(BASE_URL))
+
+    missed_segments = [x for x in needed_segments
+                       if x not in gotten_segments]
 
     # write the segments to recover to a txt file
     with open(str(write_dir / (args.cc_dump + "_recovery_segments.txt")),
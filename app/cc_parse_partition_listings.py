@@ -4,7 +4,6 @@ import urllib.request
 import io
 import gzip
 from datetime import datetime
-from pathlib import Path
 import settings
 
 parser = argparse.ArgumentParser()
@@ -61,29 +60,22 @@ def main():
     decompressed_file = gzip.GzipFile(fileobj=compressed_file)
     listings = decompressed_file.read().decode("utf-8").splitlines()
 
-    # partition listings and save as txt files
-    idx = 0
-    for i in range(0, len(listings), int(partition_size)):
+    # create node folders up front
+    for node in range(1, args.num_nodes + 1):
+        os.makedirs(os.path.join(listings_dir, str(node)), exist_ok=True)
+
+    # partition listings and write each partition directly into the folder of
+    # the node it is assigned to (round-robin over nodes)
+    partition_size = int(partition_size)
+    for idx, i in enumerate(range(0, len(listings), partition_size)):
+        node = (idx % args.num_nodes) + 1
         save_as = os.path.join(
-            listings_dir, f"wat.paths.part_{get_idx(idx, n_digits=4)}.txt"
+            listings_dir, str(node),
+            f"wat.paths.part_{get_idx(idx, n_digits=4)}.txt"
         )
 
         with open(save_as, "w") as f:
-            f.write("\n".join(listings[i: i + int(partition_size)]))
-
-        idx += 1
-
-    # distribute accross node folders
-    for i in range(1, args.num_nodes + 1):
-        subdir = os.path.join(listings_dir, str(i))
-        os.mkdir(subdir)
-
-    files = list(Path(listings_dir).glob('*.txt'))
-
-    curr_subdir = 1
-    for f in files:
-        f.rename(Path(listings_dir) / str(curr_subdir) / f.name)
-        curr_subdir = (curr_subdir % args.num_nodes) + 1
+            f.write("\n".join(listings[i: i + partition_size]))
 
 
 if __name__ == '__main__':
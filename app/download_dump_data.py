@@ -6,6 +6,24 @@ import argparse
 import pandas as pd
 from pathlib import Path
 from alive_progress import alive_bar
+from sqlalchemy.dialects.postgresql import insert
+
+# number of records inserted per statement
+DB_INSERT_CHUNK_SIZE = 1000
+
+# httpx exceptions which are raised for malformed urls, unsupported schemes or
+# otherwise invalid requests; run_sess does not retry these
+HTTPX_INVALID_URL_ERRORS = (
+    "InvalidURL", "UnsupportedProtocol", "LocalProtocolError"
+)
+
+# httpx transport exceptions; run_sess retries these, so they are only logged
+# once all retries of a request have failed
+HTTPX_MAX_RETRY_ERRORS = (
+    "ConnectError", "ConnectTimeout", "ReadError", "ReadTimeout",
+    "WriteError", "WriteTimeout", "PoolTimeout", "CloseError", "ProxyError",
+    "RemoteProtocolError"
+)
 
 
 def init_or_add_to_count_map(mapping: dict, key, count: int) -> dict:
@@ -17,6 +35,21 @@ def init_or_add_to_count_map(mapping: dict, key, count: int) -> dict:
     return mapping
 
 
+def insert_on_conflict_nothing(table, conn, keys, data_iter) -> int:
+    r"""
+    Insert method for DataFrame.to_sql: inserts all rows with one multi-row
+    statement, skipping rows that violate the url_hash uniqueness constraint.
+
+    @return: number of inserted rows
+    """
+    data = [dict(zip(keys, row)) for row in data_iter]
+    stmt = insert(table.table).values(data).on_conflict_do_nothing(
+        index_elements=['url_hash']
+    )
+    result = conn.execute(stmt)
+    return result.rowcount
+
+
 def error_check(tracker: dict, err_str: str):
     # covers large majority of errors
 
@@ -26,16 +59,15 @@ def error_check(tracker: dict, err_str: str):
             http_err_num = err_str.split('=')[-1]
             init_or_add_to_count_map(tracker, "HTTP-" + str(http_err_num), 1)
 
-        elif "MaxRetryError" in err_str:
-            init_or_add_to_count_map(tracker, "HTTP-MaxRetry", 1)
-
         elif "InvalidContentType" in err_str:
             init_or_add_to_count_map(tracker, "HTTP-ContentType", 1)
 
-        elif (("InvalidURL" in err_str) or ("Invalid URL" in err_str) or (
-                "InvalidSchema" in err_str)):
+        elif any(err in err_str for err in HTTPX_INVALID_URL_ERRORS):
             init_or_add_to_count_map(tracker, "HTTP-InvalidURL", 1)
 
+        elif any(err in err_str for err in HTTPX_MAX_RETRY_ERRORS):
+            init_or_add_to_count_map(tracker, "HTTP-MaxRetry", 1)
+
         elif "TooManyRedirects" in err_str:
             init_or_add_to_count_map(tracker, "HTTP-TooManyRedirects", 1)
 
@@ -220,17 +252,30 @@ def main():
         df = df.where(pd.notnull(df), None)
         df["content_language"] = df["content_language"].str.split(",")
 
-        # note this takes uniqueness of url_hash constraint into account
-        # automatically, by skipping on integrityerrors
+        # insert in chunks; duplicates of the url_hash constraint are skipped
+        # by the database. Only if a chunk contains an unclean row, fall back
+        # to inserting its rows one by one, skipping the failing ones
         with alive_bar(len(df)) as bar:
-            for _, row in df.iterrows():
+            for start in range(0, len(df), DB_INSERT_CHUNK_SIZE):
+                chunk = df.iloc[start:start + DB_INSERT_CHUNK_SIZE]
                 try:
-                    row.to_frame().T.to_sql('sources_record', engine,
-                                            if_exists='append', index=False)
+                    inserted = chunk.to_sql(
+                        'sources_record', engine, if_exists='append',
+                        index=False, method=insert_on_conflict_nothing
+                    )
+                    skipped_urls_db += len(chunk) - inserted
                 except Exception as _:
-                    # print("skipping duplicate / unclean row")
-                    skipped_urls_db += 1
-                bar()
+                    for i in range(len(chunk)):
+                        try:
+                            inserted = chunk.iloc[i:i + 1].to_sql(
+                                'sources_record', engine, if_exists='append',
+                                index=False, method=insert_on_conflict_nothing
+                            )
+                            skipped_urls_db += 1 - inserted
+                        except Exception as _:
+                            # print("skipping duplicate / unclean row")
+                            skipped_urls_db += 1
+                bar(len(chunk))
 
         print("bad records skipped: " + str(skipped_urls_db))
 
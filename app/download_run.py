@@ -1,11 +1,17 @@
 import argparse
+import itertools
 import os
-import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 from datetime import datetime as dt
 import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterator, List, Tuple
 import joblib
-from src.data_sources.download_process import DownloadProcess
+from src.data_sources.download_process import init_download_worker, \
+    download_batch
 
 # ! shards are now worker-controlled
 DEFAULT_TIMEOUT = 8
@@ -13,7 +19,14 @@ DEFAULT_RETRIES = 5
 DEFAULT_REDIRECTS = 4
 DEFAULT_BACKOFF_FACTOR = 0.8
 DEFAULT_SUBSET_SIZE = 300000
-CPU_PER_WORKER = 2
+DEFAULT_MAX_CONCURRENCY = 100
+# batches are downloaded concurrently, so they should cover the concurrency
+DEFAULT_NUM_BATCH = 100
+CPU_PER_WORKER = 1
+# number of batches in flight per worker
+BATCHES_PER_WORKER = 4
+# number of rows read from the url parquet at a time
+URL_READ_BATCH_SIZE = 65536
 
 
 def get_args() -> argparse.Namespace:
@@ -40,12 +53,12 @@ def get_args() -> argparse.Namespace:
     arg_parser.add_argument("--subset_size", "-ss", help="subset size",
                             type=int,
                             default=DEFAULT_SUBSET_SIZE)
-    arg_parser.add_argument("--num_threads", "-nt",
-                            help="number of threads per worker", type=int,
-                            default=10)
+    arg_parser.add_argument("--max_concurrency", "-mc",
+                            help="max. concurrent downloads per worker",
+                            type=int, default=DEFAULT_MAX_CONCURRENCY)
     arg_parser.add_argument("--num_batch", "-nb",
                             help="number of docs per work batch", type=int,
-                            default=10)
+                            default=DEFAULT_NUM_BATCH)
     arg_parser.add_argument("--single_url_debug", "-sud",
                             help="single url input, for debugging purposes",
                             default=None)
@@ -61,113 +74,108 @@ def sources_iterator():
     pass
 
 
-class URLBatchProvider(mp.Process):
-    def __init__(self, inputs_queue: mp.Queue, source_parquets: str,
-                 max_dls: int = -1, num_workers: int = 1):
-        """
-        Provides URL batches for worker processes to handle.
-
-        @param inputs_queue: Queue to write to.
-        @param source_parquets: Directory containing parquets from which to
-            draw urls.
-        @param max_dls: If greater than 0, max urls to write to queue before
-            shutdown.
-        @param num_workers: Number of workers reading from the queue.
-        """
-
-        super(URLBatchProvider, self).__init__()
-        self.inputs_queue = inputs_queue
-        self.source_parquets = source_parquets
-        self.max_dls = max_dls
-        self.num_workers = num_workers
-
-    def run(self):
-        """
-        The core loop of the process, required by pyhton multiprocessing.
-        """
-
-        # enqueue URL batches
-        args = get_args()
-        if args.single_url_debug is not None:
-            self.inputs_queue.put([(args.single_url_debug, "anyhash")])
-        else:
-            url_iterator = self._url_iterator()
-            for batch in url_iterator:
-                self.inputs_queue.put(batch)
-
-        # signal workers to stop
-        for _ in range(self.num_workers):
-            self.inputs_queue.put(None)
-
-    def _url_iterator(self):  # noqa
-        """
-        An iterator that yields url batches.
-        """
-        args = get_args()
-
-        # parse the commoncrawl URLs into a dataframe
-        urls_df = pd.read_parquet(args.input)
-        if args.subset_size > 0:
-            urls_df = urls_df.sample(n=args.subset_size)
-        # shuffle
-        urls_df = urls_df.sample(frac=1)
-        # load URL list into memory
-        url_list = [(u, h) for u, h in
-                    zip(urls_df['url'].tolist(), urls_df['url_hash'].tolist())]
-
-        # yield chunks
-        for i in range(0, len(url_list), args.num_batch):
-            yield url_list[i:i + args.num_batch]
+def url_iterator(args: argparse.Namespace) -> Iterator[Tuple[str, str]]:
+    """
+    An iterator that yields (url, url_hash) pairs in random order.
+
+    @param args: Parsed command line arguments of the job.
+    """
+    if args.single_url_debug is not None:
+        yield args.single_url_debug, "anyhash"
+        return
+
+    # stream the commoncrawl URLs from the parquet file
+    pq_file = pq.ParquetFile(args.input)
+    num_rows = pq_file.metadata.num_rows
+    rng = np.random.default_rng()
+
+    # draw the row indices of the subset up front, so that only sampled
+    # rows are kept in memory while streaming over the file
+    keep = None
+    if 0 < args.subset_size < num_rows:
+        keep = np.sort(
+            rng.choice(num_rows, size=args.subset_size, replace=False)
+        )
+
+    urls, url_hashes = [], []
+    offset = 0
+    for batch in pq_file.iter_batches(
+            batch_size=URL_READ_BATCH_SIZE, columns=['url', 'url_hash']
+    ):
+        batch_rows = batch.num_rows
+        if keep is not None:
+            lo, hi = np.searchsorted(keep, [offset, offset + batch_rows])
+            batch = batch.take(pa.array(keep[lo:hi] - offset))
+        offset += batch_rows
+
+        urls.extend(batch.column('url').to_pylist())
+        url_hashes.extend(batch.column('url_hash').to_pylist())
+
+    # shuffle
+    for i in rng.permutation(len(urls)):
+        yield urls[i], url_hashes[i]
+
+
+def url_batches(
+        args: argparse.Namespace
+) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Provides URL batches of size num_batch for the download workers.
+
+    @param args: Parsed command line arguments of the job.
+    """
+    urls = url_iterator(args)
+    while batch := list(itertools.islice(urls, args.num_batch)):
+        yield batch
 
 
 def main():
     # parse args
     args = get_args()
 
-    num_cpus = int(os.environ.get("SLURM_CPUS_PER_TASK", joblib.cpu_count()))
-
-    # determine the CC dump ID
-    cc_dump_id = args.input.split('/')[-2]
-    node_id = args.input.split('/')[-1]
+    # determine the CC dump ID; input is <...>/<cc_dump_id>/<node_id>.parquet
+    input_fp = Path(args.input)
+    cc_dump_id = input_fp.parent.name
     if not cc_dump_id.startswith('CC-MAIN'):
         raise NotImplementedError(
             'only commoncrawl sources are supported at the moment.')
-    if not node_id.endswith('.parquet'):
+    if input_fp.suffix != '.parquet':
         raise NotImplementedError('URLs must be in a parquet file.')
 
-    cc_dump_id = cc_dump_id.replace('.parquet', '')
+    num_cpus = int(os.environ.get("SLURM_CPUS_PER_TASK", joblib.cpu_count()))
 
-    if not Path(args.write_dir).exists():
-        Path(args.write_dir).mkdir(parents=True, exist_ok=True)
+    Path(args.write_dir).mkdir(parents=True, exist_ok=True)
 
     num_worker_processes = (num_cpus - CPU_PER_WORKER) // CPU_PER_WORKER
 
     print(f"[{get_timestamp()}] num_downloaders: {num_worker_processes}")
 
-    queue_buffer_size = 4 * num_worker_processes
-    inputs_queue = mp.Queue(maxsize=queue_buffer_size)
-
-    download_processes = []
-    for i in range(num_worker_processes):
-        downloader = DownloadProcess(inputs_queue, cc_dump_id, args.timeout,
-                                     args.retries, args.redirects,
-                                     args.backoff_factor, args.num_threads,
-                                     args.write_dir)
-        downloader.start()
-        print("started downloader")
-        download_processes.append(downloader)
-
-    provider_process = URLBatchProvider(inputs_queue, args.input,
-                                        max_dls=args.subset_size,
-                                        num_workers=num_worker_processes)
-    provider_process.start()
-
-    # wait for provider to finish
-    provider_process.join()
-
-    # wait for workers to finish
-    for downloader in download_processes:
-        downloader.join()
+    # every pool process sets up its download state once, in the initializer;
+    # forkserver avoids forking the threads of the parent process
+    executor = ProcessPoolExecutor(
+        max_workers=num_worker_processes,
+        mp_context=mp.get_context('forkserver'),
+        initializer=init_download_worker,
+        initargs=(cc_dump_id, args.timeout, args.retries, args.redirects,
+                  args.backoff_factor, args.max_concurrency, args.write_dir)
+    )
+
+    # keep a bounded number of batches in flight, so that the url batches
+    # are handed out as workers free up rather than all at once
+    max_in_flight = num_worker_processes * BATCHES_PER_WORKER
+    with executor:
+        in_flight = set()
+        for batch in url_batches(args):
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                # re-raise errors of pool processes (e.g. a failed worker
+                # initialization or a crashed process) instead of dropping them
+                for fut in done:
+                    fut.result()
+            in_flight.add(executor.submit(download_batch, batch))
+
+        for fut in wait(in_flight).done:
+            fut.result()
 
 
 if __name__ == '__main__':
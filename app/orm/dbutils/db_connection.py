@@ -1,15 +1,23 @@
-from logging.config import fileConfig
+import functools
 
 from sqlalchemy import create_engine, Engine
-from sqlalchemy import pool
 import settings
 import configparser
 
+# recycle pooled connections before typical server-side idle timeouts
+POOL_RECYCLE_SECONDS = 1800
 
+
+@functools.lru_cache(maxsize=1)
 def connect_to_db() -> Engine:
+    r"""Returns the engine for the database configured in alembic.ini. The
+    engine (and with it its connection pool) is created once and reused by
+    subsequent calls within the same process.
+    """
     config = configparser.ConfigParser()
     config.read(settings.filesystem.ALEMBIC_INI_LOC)
     key = config.get('alembic', 'sqlalchemy.url')
-    engine = create_engine(key)
+    engine = create_engine(
+        key, pool_pre_ping=True, pool_recycle=POOL_RECYCLE_SECONDS
+    )
     return engine
-
@@ -1,6 +1,7 @@
 from typing import List
 from sqlalchemy import (
-    String, DateTime, Column, ARRAY, Integer, JSON, Float
+    String, DateTime, Column, ARRAY, Integer, JSON, Float, SmallInteger,
+    Boolean
 )
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
@@ -12,21 +13,23 @@ class SourcesRecordDB(Base):
     """ dataclass for storing a single record for the sources relation """
     __tablename__ = "sources_record"
 
-    url: str = Column(String(10000), nullable=False)
+    url: str = Column(String(2048), nullable=False)
     url_hash: str = Column(String(1000), primary_key=True)
     crawl_id: str = Column(String(1000), nullable=False)
     shard_id: str = Column(String(1000), nullable=False)
-    filename: str = Column(String(10000), nullable=True)
-    bytehash: str = Column(String(10000), nullable=True)
+    filename: str = Column(String(1024), nullable=True)
+    bytehash: str = Column(String(128), nullable=True)
 
     # http header fields
-    status_code: str = Column(String(200), nullable=True)
+    status_code: int = Column(SmallInteger, nullable=True)
     content_type: str = Column(String(1000), nullable=True)
     content_length: str = Column(String(1000), nullable=True)
     content_encoding: str = Column(String(1000), nullable=True)
     content_language: List[str] = Column(ARRAY(String), nullable=True)
-    last_modified: datetime = Column(DateTime, nullable=True)
-    source_filename: str = Column(String(10000), nullable=True)
+    last_modified: datetime = Column(
+        DateTime(timezone=True), nullable=True
+    )
+    source_filename: str = Column(String(1024), nullable=True)
 
     # oletools fields
     olet_ftype: str = Column(String(200), nullable=True)
@@ -40,7 +43,7 @@ class SourcesRecordDB(Base):
     olet_ObjectPool: str = Column(String(200), nullable=True)
     olet_flash: str = Column(String(200), nullable=True)
     olet_python_codec: str = Column(String(200), nullable=True)
-    olet_pass: bool = Column(String(200), nullable=True)
+    olet_pass: bool = Column(Boolean, nullable=True)
 
     timestamp: datetime = Column(DateTime, default=datetime.utcnow, nullable=False)
     exception: str = Column(String(1000), nullable=True)
@@ -57,11 +60,11 @@ class DocMetadataRecordDB(Base):
     annotated_shard_id: str = Column(String(1000), nullable=False)
 
     num_pages: int = Column(Integer, nullable=False)
-    sources_filename: str = Column(String(10000), nullable=False)
+    sources_filename: str = Column(String(1024), nullable=False)
 
     # ! added later through join
-    url: str = Column(String(10000), nullable=False, primary_key=True)
-    filename: str = Column(String(10000), nullable=True)
+    url: str = Column(String(2048), nullable=False, primary_key=True)
+    filename: str = Column(String(1024), nullable=True)
 
     # text metrics
     word_count: int = Column(Integer, nullable=False)
@@ -119,11 +122,17 @@ class DocMetadataRecordDB(Base):
     core_category: str = Column(String(1000), nullable=True)
     core_comments: str = Column(String(1000), nullable=True)
     core_content_status: str = Column(String(1000), nullable=True)
-    core_created: datetime = Column(DateTime, nullable=True)
+    core_created: datetime = Column(
+        DateTime(timezone=True), nullable=True
+    )
     core_identifier: str = Column(String(1000), nullable=True)
     core_keywords: str = Column(String(1000), nullable=True)
-    core_last_printed: datetime = Column(DateTime, nullable=True)
-    core_modified: datetime = Column(DateTime, nullable=True)
+    core_last_printed: datetime = Column(
+        DateTime(timezone=True), nullable=True
+    )
+    core_modified: datetime = Column(
+        DateTime(timezone=True), nullable=True
+    )
     core_subject: str = Column(String(1000), nullable=True)
     core_title: str = Column(String(1000), nullable=True)
     core_version: str = Column(String(1000), nullable=True)
@@ -133,14 +142,14 @@ class PageMetadataRecordDB(Base):
     __tablename__ = "page_metadata_record"
 
     # same as in sources record DB
-    page_id: str = Column(String(10000), primary_key=True)
-    url: str = Column(String(10000), nullable=False, primary_key=True)
+    page_id: str = Column(String(1024), primary_key=True)
+    url: str = Column(String(2048), nullable=False, primary_key=True)
     url_hash: str = Column(String(1000), nullable=False)
     crawl_id: str = Column(String(1000), nullable=False)
     sources_shard_id: str = Column(String(1000), nullable=False)
     annotated_shard_id: str = Column(String(1000), nullable=False)
 
-    filename: str = Column(String(10000), nullable=False)
+    filename: str = Column(String(1024), nullable=False)
 
     # text features
     pdf_word_count: int = Column(Integer, nullable=False)
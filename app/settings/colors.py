@@ -1,7 +1,9 @@
 """
 This module contains all basic settings related to entity colors.
 """
-import ast
+import types
+
+import numpy as np
 
 import settings.entities as entities
 
@@ -41,109 +43,140 @@ COLOR_FORM_FIELD = (160, 255, 255)
 COLOR_FORM_TAG = (167, 255, 255)
 
 # map color --> entity string representation
-# note use of str() as list is not hashable
-COLOR_TO_ENTITY_CATEGORY_NAME = {
-    str(COLOR_DOCUMENT_TITLE): entities.ENTITY_TITLE_NAME,
-    str(COLOR_SECTION_HEADING_1): entities.ENTITY_HEADING_1_NAME,
-    str(COLOR_SECTION_HEADING_2): entities.ENTITY_HEADING_2_NAME,
-    str(COLOR_SECTION_HEADING_3): entities.ENTITY_HEADING_3_NAME,
-    str(COLOR_SECTION_HEADING_4): entities.ENTITY_HEADING_4_NAME,
-    str(COLOR_SECTION_HEADING_5): entities.ENTITY_HEADING_5_NAME,
-    str(COLOR_SECTION_HEADING_6): entities.ENTITY_HEADING_6_NAME,
-    str(COLOR_SECTION_HEADING_7): entities.ENTITY_HEADING_7_NAME,
-    str(COLOR_SECTION_HEADING_8): entities.ENTITY_HEADING_8_NAME,
-    str(COLOR_SECTION_HEADING_9): entities.ENTITY_HEADING_9_NAME,
-    str(COLOR_TEXT): entities.ENTITY_TEXT_NAME,
-    str(COLOR_LIST): entities.ENTITY_LIST_NAME,
-    str(COLOR_HEADER): entities.ENTITY_HEADER_NAME,
-    str(COLOR_FOOTER): entities.ENTITY_FOOTER_NAME,
-    str(COLOR_TABLE_HEADER): entities.ENTITY_TABLE_HEADER_NAME,
-    str(COLOR_TABLE): entities.ENTITY_TABLE_NAME,
-    str(COLOR_TOC): entities.ENTITY_TOC_NAME,
-    str(COLOR_BIBLIOGRAPHY): entities.ENTITY_BIBLIOGRAPHY_NAME,
-    str(COLOR_QUOTE): entities.ENTITY_QUOTE_NAME,
-    str(COLOR_EQUATION): entities.ENTITY_EQUATION_NAME,
-    str(COLOR_FIGURES): entities.ENTITY_FIGURE_NAME,
-    str(COLOR_TABLE_CAPTIONS): entities.ENTITY_TABLE_CAPTION_NAME,
-    str(COLOR_FOOTNOTE): entities.ENTITY_FOOTNOTE_NAME,
-    str(COLOR_ANNOTATION): entities.ENTITY_ANNOTATION_NAME,
-    str(COLOR_FORM_FIELD): entities.ENTITY_FORM_FIELD_NAME,
-    str(COLOR_FORM_TAG): entities.ENTITY_FORM_TAG_NAME,
+# colors are hsv tuples, which are hashable and used as keys directly
+COLOR_TO_ENTITY_CATEGORY_NAME = types.MappingProxyType({
+    COLOR_DOCUMENT_TITLE: entities.ENTITY_TITLE_NAME,
+    COLOR_SECTION_HEADING_1: entities.ENTITY_HEADING_1_NAME,
+    COLOR_SECTION_HEADING_2: entities.ENTITY_HEADING_2_NAME,
+    COLOR_SECTION_HEADING_3: entities.ENTITY_HEADING_3_NAME,
+    COLOR_SECTION_HEADING_4: entities.ENTITY_HEADING_4_NAME,
+    COLOR_SECTION_HEADING_5: entities.ENTITY_HEADING_5_NAME,
+    COLOR_SECTION_HEADING_6: entities.ENTITY_HEADING_6_NAME,
+    COLOR_SECTION_HEADING_7: entities.ENTITY_HEADING_7_NAME,
+    COLOR_SECTION_HEADING_8: entities.ENTITY_HEADING_8_NAME,
+    COLOR_SECTION_HEADING_9: entities.ENTITY_HEADING_9_NAME,
+    COLOR_TEXT: entities.ENTITY_TEXT_NAME,
+    COLOR_LIST: entities.ENTITY_LIST_NAME,
+    COLOR_HEADER: entities.ENTITY_HEADER_NAME,
+    COLOR_FOOTER: entities.ENTITY_FOOTER_NAME,
+    COLOR_TABLE_HEADER: entities.ENTITY_TABLE_HEADER_NAME,
+    COLOR_TABLE: entities.ENTITY_TABLE_NAME,
+    COLOR_TOC: entities.ENTITY_TOC_NAME,
+    COLOR_BIBLIOGRAPHY: entities.ENTITY_BIBLIOGRAPHY_NAME,
+    COLOR_QUOTE: entities.ENTITY_QUOTE_NAME,
+    COLOR_EQUATION: entities.ENTITY_EQUATION_NAME,
+    COLOR_FIGURES: entities.ENTITY_FIGURE_NAME,
+    COLOR_TABLE_CAPTIONS: entities.ENTITY_TABLE_CAPTION_NAME,
+    COLOR_FOOTNOTE: entities.ENTITY_FOOTNOTE_NAME,
+    COLOR_ANNOTATION: entities.ENTITY_ANNOTATION_NAME,
+    COLOR_FORM_FIELD: entities.ENTITY_FORM_FIELD_NAME,
+    COLOR_FORM_TAG: entities.ENTITY_FORM_TAG_NAME,
+})
+
+COLOR_TO_ENTITY_CATEGORY_ID = types.MappingProxyType({
+    COLOR_DOCUMENT_TITLE: entities.ENTITY_TITLE_ID,
+    COLOR_SECTION_HEADING_1: entities.ENTITY_HEADING_1_ID,
+    COLOR_SECTION_HEADING_2: entities.ENTITY_HEADING_2_ID,
+    COLOR_SECTION_HEADING_3: entities.ENTITY_HEADING_3_ID,
+    COLOR_SECTION_HEADING_4: entities.ENTITY_HEADING_4_ID,
+    COLOR_SECTION_HEADING_5: entities.ENTITY_HEADING_5_ID,
+    COLOR_SECTION_HEADING_6: entities.ENTITY_HEADING_6_ID,
+    COLOR_SECTION_HEADING_7: entities.ENTITY_HEADING_7_ID,
+    COLOR_SECTION_HEADING_8: entities.ENTITY_HEADING_8_ID,
+    COLOR_SECTION_HEADING_9: entities.ENTITY_HEADING_9_ID,
+    COLOR_TEXT: entities.ENTITY_TEXT_ID,
+    COLOR_LIST: entities.ENTITY_LIST_ID,
+    COLOR_HEADER: entities.ENTITY_HEADER_ID,
+    COLOR_FOOTER: entities.ENTITY_FOOTER_ID,
+    COLOR_TABLE_HEADER: entities.ENTITY_TABLE_HEADER_ID,
+    COLOR_TABLE: entities.ENTITY_TABLE_ID,
+    COLOR_TOC: entities.ENTITY_TOC_ID,
+    COLOR_BIBLIOGRAPHY: entities.ENTITY_BIBLIOGRAPHY_ID,
+    COLOR_QUOTE: entities.ENTITY_QUOTE_ID,
+    COLOR_EQUATION: entities.ENTITY_EQUATION_ID,
+    COLOR_FIGURES: entities.ENTITY_FIGURE_ID,
+    COLOR_TABLE_CAPTIONS: entities.ENTITY_TABLE_CAPTION_ID,
+    COLOR_FOOTNOTE: entities.ENTITY_FOOTNOTE_ID,
+    COLOR_ANNOTATION: entities.ENTITY_ANNOTATION_ID,
+    COLOR_FORM_FIELD: entities.ENTITY_FORM_FIELD_ID,
+    COLOR_FORM_TAG: entities.ENTITY_FORM_TAG_ID,
+})
+
+# table sub-entities are drawn with the color of their parent entity
+_TABLE_SUBENTITY_NAME_TO_COLOR = {
+    entities.ENTITY_TABLE_CELL_NAME: COLOR_TABLE,
+    entities.ENTITY_TABLE_ROW_NAME: COLOR_TABLE,
+    entities.ENTITY_TABLE_COLUMN_NAME: COLOR_TABLE,
+    entities.ENTITY_TABLE_HEADER_CELL_NAME: COLOR_TABLE_HEADER,
+    entities.ENTITY_TABLE_HEADER_ROW_NAME: COLOR_TABLE_HEADER,
 }
 
-COLOR_TO_ENTITY_CATEGORY_ID = {
-    str(COLOR_DOCUMENT_TITLE): entities.ENTITY_TITLE_ID,
-    str(COLOR_SECTION_HEADING_1): entities.ENTITY_HEADING_1_ID,
-    str(COLOR_SECTION_HEADING_2): entities.ENTITY_HEADING_2_ID,
-    str(COLOR_SECTION_HEADING_3): entities.ENTITY_HEADING_3_ID,
-    str(COLOR_SECTION_HEADING_4): entities.ENTITY_HEADING_4_ID,
-    str(COLOR_SECTION_HEADING_5): entities.ENTITY_HEADING_5_ID,
-    str(COLOR_SECTION_HEADING_6): entities.ENTITY_HEADING_6_ID,
-    str(COLOR_SECTION_HEADING_7): entities.ENTITY_HEADING_7_ID,
-    str(COLOR_SECTION_HEADING_8): entities.ENTITY_HEADING_8_ID,
-    str(COLOR_SECTION_HEADING_9): entities.ENTITY_HEADING_9_ID,
-    str(COLOR_TEXT): entities.ENTITY_TEXT_ID,
-    str(COLOR_LIST): entities.ENTITY_LIST_ID,
-    str(COLOR_HEADER): entities.ENTITY_HEADER_ID,
-    str(COLOR_FOOTER): entities.ENTITY_FOOTER_ID,
-    str(COLOR_TABLE_HEADER): entities.ENTITY_TABLE_HEADER_ID,
-    str(COLOR_TABLE): entities.ENTITY_TABLE_ID,
-    str(COLOR_TOC): entities.ENTITY_TOC_ID,
-    str(COLOR_BIBLIOGRAPHY): entities.ENTITY_BIBLIOGRAPHY_ID,
-    str(COLOR_QUOTE): entities.ENTITY_QUOTE_ID,
-    str(COLOR_EQUATION): entities.ENTITY_EQUATION_ID,
-    str(COLOR_FIGURES): entities.ENTITY_FIGURE_ID,
-    str(COLOR_TABLE_CAPTIONS): entities.ENTITY_TABLE_CAPTION_ID,
-    str(COLOR_FOOTNOTE): entities.ENTITY_FOOTNOTE_ID,
-    str(COLOR_ANNOTATION): entities.ENTITY_ANNOTATION_ID,
-    str(COLOR_FORM_FIELD): entities.ENTITY_FORM_FIELD_ID,
-    str(COLOR_FORM_TAG): entities.ENTITY_FORM_TAG_ID,
+_TABLE_SUBENTITY_ID_TO_COLOR = {
+    entities.ENTITY_TABLE_CELL_ID: COLOR_TABLE,
+    entities.ENTITY_TABLE_ROW_ID: COLOR_TABLE,
+    entities.ENTITY_TABLE_COLUMN_ID: COLOR_TABLE,
+    entities.ENTITY_TABLE_HEADER_CELL_ID: COLOR_TABLE_HEADER,
+    entities.ENTITY_TABLE_HEADER_ROW_ID: COLOR_TABLE_HEADER,
 }
 
-ENTITY_NAME_TO_COLOR = {
-    v: ast.literal_eval(k) for k, v in COLOR_TO_ENTITY_CATEGORY_NAME.items()
-}
-ENTITY_NAME_TO_COLOR[entities.ENTITY_TABLE_CELL_NAME] = COLOR_TABLE
-ENTITY_NAME_TO_COLOR[entities.ENTITY_TABLE_ROW_NAME] = COLOR_TABLE
-ENTITY_NAME_TO_COLOR[entities.ENTITY_TABLE_COLUMN_NAME] = COLOR_TABLE
-ENTITY_NAME_TO_COLOR[
-    entities.ENTITY_TABLE_HEADER_CELL_NAME
-] = COLOR_TABLE_HEADER
-ENTITY_NAME_TO_COLOR[
-    entities.ENTITY_TABLE_HEADER_ROW_NAME
-] = COLOR_TABLE_HEADER
-
-ENTITY_CATEGORY_ID_TO_COLOR = {
-    v: ast.literal_eval(k) for k, v in COLOR_TO_ENTITY_CATEGORY_ID.items()
-}
-ENTITY_CATEGORY_ID_TO_COLOR[entities.ENTITY_TABLE_CELL_ID] = COLOR_TABLE
-ENTITY_CATEGORY_ID_TO_COLOR[entities.ENTITY_TABLE_ROW_ID] = COLOR_TABLE
-ENTITY_CATEGORY_ID_TO_COLOR[entities.ENTITY_TABLE_COLUMN_ID] = COLOR_TABLE
-ENTITY_CATEGORY_ID_TO_COLOR[
-    entities.ENTITY_TABLE_HEADER_CELL_ID
-] = COLOR_TABLE_HEADER
-ENTITY_CATEGORY_ID_TO_COLOR[
-    entities.ENTITY_TABLE_HEADER_ROW_ID
-] = COLOR_TABLE_HEADER
+ENTITY_NAME_TO_COLOR = types.MappingProxyType({
+    **{v: k for k, v in COLOR_TO_ENTITY_CATEGORY_NAME.items()},
+    **_TABLE_SUBENTITY_NAME_TO_COLOR
+})
+
+ENTITY_CATEGORY_ID_TO_COLOR = types.MappingProxyType({
+    **{v: k for k, v in COLOR_TO_ENTITY_CATEGORY_ID.items()},
+    **_TABLE_SUBENTITY_ID_TO_COLOR
+})
+
+# dense hsv palette indexed by entity category id, e.g. to color an array of
+# entity ids in a single lookup
+ENTITY_PALETTE = np.zeros(
+    (max(ENTITY_CATEGORY_ID_TO_COLOR) + 1, 3), dtype=np.uint8
+)
+for _entity_id, _color in ENTITY_CATEGORY_ID_TO_COLOR.items():
+    ENTITY_PALETTE[_entity_id] = _color
+ENTITY_PALETTE.setflags(write=False)
+del _entity_id, _color
 
 
 def get_entity_name(color) -> str:
-    return COLOR_TO_ENTITY_CATEGORY_NAME.get(str(color))
+    return COLOR_TO_ENTITY_CATEGORY_NAME.get(tuple(color))
 
 
 def get_entity_category_id(color) -> int:
-    return COLOR_TO_ENTITY_CATEGORY_ID.get(str(color))
-
+    return COLOR_TO_ENTITY_CATEGORY_ID.get(tuple(color))
 
-# put all colors in a list
-ALL_COLORS = [
-    eval(color_var) for color_var in dir()
-    if color_var.startswith("COLOR_") and isinstance(eval(color_var), tuple)
-]
 
-# and sort with increasing hue
-ALL_COLORS.sort(key=lambda color: color[0])
-ALL_COLORS.remove(COLOR_WHITESPACE)
+# all entity colors (i.e. without whitespace), with increasing hue
+ALL_COLORS = (
+    COLOR_DOCUMENT_TITLE,
+    COLOR_SECTION_HEADING_1,
+    COLOR_SECTION_HEADING_2,
+    COLOR_SECTION_HEADING_3,
+    COLOR_SECTION_HEADING_4,
+    COLOR_SECTION_HEADING_5,
+    COLOR_SECTION_HEADING_6,
+    COLOR_SECTION_HEADING_7,
+    COLOR_SECTION_HEADING_8,
+    COLOR_SECTION_HEADING_9,
+    COLOR_TEXT,
+    COLOR_LIST,
+    COLOR_HEADER,
+    COLOR_FOOTER,
+    COLOR_TABLE_HEADER,
+    COLOR_TABLE,
+    COLOR_TOC,
+    COLOR_QUOTE,
+    COLOR_EQUATION,
+    COLOR_FIGURES,
+    COLOR_TABLE_CAPTIONS,
+    COLOR_FOOTNOTE,
+    COLOR_ANNOTATION,
+    COLOR_BIBLIOGRAPHY,
+    COLOR_FORM_FIELD,
+    COLOR_FORM_TAG,
+)
 
 # put heading colors in a list
 COLORS_SECTION_HEADINGS = [
@@ -183,20 +216,24 @@ ENTITIES_HUES_WITHOUT_CYCLING = [
     COLOR_TEXT[0]
 ]
 
-# run some checks
-assert all(
-    map(
-        lambda x: (
-                (HUE_MIN <= x[0] <= HUE_MAX) &
-                (SAT_MIN <= x[1] <= SAT_MAX) &
-                (VAL_MIN <= x[2] <= VAL_MAX)
-        ), ALL_COLORS
-    )
-), "Some colors are not in the correct range! make sure all colors defined" \
-   " in settings.colors are in hue saturation value (HSV) format. Note that" \
-   " we adopt opencv's convention: hue is in [0, 179], saturation and value" \
-   " are in [0, 255]."
-
-assert COLOR_TABLE[0] - COLOR_TABLE_HEADER[0] == GRANULARITY, \
-    "The table hue value must be {} units away from the" \
-    " table header hue value!".format(GRANULARITY)
+# run some checks; these are stripped when running with -O
+if __debug__:
+    assert all(
+        map(
+            lambda x: (
+                    (HUE_MIN <= x[0] <= HUE_MAX) &
+                    (SAT_MIN <= x[1] <= SAT_MAX) &
+                    (VAL_MIN <= x[2] <= VAL_MAX)
+            ), ALL_COLORS
+        )
+    ), "Some colors are not in the correct range! make sure all colors defined" \
+       " in settings.colors are in hue saturation value (HSV) format. Note that" \
+       " we adopt opencv's convention: hue is in [0, 179], saturation and value" \
+       " are in [0, 255]."
+
+    assert COLOR_TABLE[0] - COLOR_TABLE_HEADER[0] == GRANULARITY, \
+        "The table hue value must be {} units away from the" \
+        " table header hue value!".format(GRANULARITY)
+
+    assert list(ALL_COLORS) == sorted(ALL_COLORS, key=lambda c: c[0]), \
+        "ALL_COLORS must be sorted with increasing hue!"
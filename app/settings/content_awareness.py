@@ -3,6 +3,7 @@
 # symbols we consider to constitute a possible form field
 # note the special triple-period symbol, which word likes to auto-create
 FORM_FIELD_SYMBOLS = ['_', '.', '…']
+FORM_FIELD_SYMBOL_SET = frozenset(FORM_FIELD_SYMBOLS)
 
 # symbols we consider to indicate a quote; must be at start and end.
 QUOTE_SYMBOLS = ["\"", "\'"]
@@ -17,5 +18,8 @@ NUMBERING_SYMBOLS = [
     '\u25A0', '\u25A1', '\u25B6', '\u2043', '\u25C6', '\u25C7', '\u25D0',
     '\u25D1'
 ]
+NUMBERING_SYMBOL_SET = frozenset(NUMBERING_SYMBOLS)
 
-NUMBERING_FOLLOWERS = ['\.', ':', '\)']
+# regex patterns of characters that may follow a number to indicate a list
+# entry
+NUMBERING_FOLLOWERS = [r'\.', ':', r'\)']
@@ -153,3 +153,10 @@ ENTITY_ID_TO_NAME = {
 ENTITY_NAME_TO_ID = {}
 for k, v in ENTITY_ID_TO_NAME.items():
     ENTITY_NAME_TO_ID[v] = k
+
+# canonical ordering of the entity ids, shared by all per entity tabulations
+# (e.g. count vectors); ENTITY_ID_TO_COL maps an entity id to its position
+ENTITY_IDS_ORDERED = tuple(sorted(ENTITY_ID_TO_NAME))
+ENTITY_ID_TO_COL = {
+    entity_id: col for col, entity_id in enumerate(ENTITY_IDS_ORDERED)
+}
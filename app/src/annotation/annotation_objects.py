@@ -10,6 +10,7 @@ This module contains the dataclasses used to represent annotations:
 """
 import dataclasses
 from datetime import datetime
+import functools
 import hashlib
 import string
 from typing import List, Tuple, Union, Dict, Any
@@ -242,6 +243,11 @@ class AnnotatedDocument:
         return self._metadata_serialized
 
 
+@functools.lru_cache(maxsize=None)
+def _column_keys(record_cls) -> Tuple[str, ...]:
+    return tuple(record_cls.__table__.columns.keys())
+
+
 def orm_to_json_dict(
         meta_record: Union[DocMetadataRecordDB, PageMetadataRecordDB]
 ) -> Dict:
@@ -250,7 +256,8 @@ def orm_to_json_dict(
             return obj.isoformat()
         return obj
 
+    # the column set is fixed per record class, so it is only resolved once
     return {
         key: _datetime_to_str(getattr(meta_record, key))
-        for key in meta_record.__class__.__table__.columns.keys()
+        for key in _column_keys(meta_record.__class__)
     }
@@ -1,3 +1,4 @@
+import numpy as np
 from typing import Dict, List, Tuple
 
 import settings.entities as entity_settings
@@ -8,16 +9,26 @@ __all__ = [
     "calc_annotation_quality_score"
 ]
 
-IGNORE_ENTITY_IDS = [
+IGNORE_ENTITY_IDS = frozenset([
     entity_settings.ENTITY_TABLE_ROW_ID,
     entity_settings.ENTITY_TABLE_CELL_ID,
     entity_settings.ENTITY_TABLE_COLUMN_ID
-]
+])
+
+BUILTIN_SOURCES = frozenset(annotation_settings.BUILTIN_SOURCES)
+
+# per entity vectors follow the canonical entity id ordering
+NUM_ENTITY_IDS = len(entity_settings.ENTITY_IDS_ORDERED)
+ENTITY_ID_TO_COL = entity_settings.ENTITY_ID_TO_COL
+
+# zero weight for entities which do not contribute to the quality score
+IGNORE_MASK = np.ones(NUM_ENTITY_IDS, dtype=np.float64)
+IGNORE_MASK[[ENTITY_ID_TO_COL[i] for i in IGNORE_ENTITY_IDS]] = 0.0
 
 
 def calc_annotation_quality_score(
         colorization_decisions: List[ColorizationDecision],
-        entity_counts: Dict[int, int],
+        entity_counts: np.ndarray,
 ) -> Tuple[float, Dict[int, float]]:
     r""" Calculate the annotation quality score for a document
 
@@ -26,58 +37,55 @@ def calc_annotation_quality_score(
         - text (str): the text of the element
         - decision_source (str): the source of the decision
         - entity_decision (int): the id of the entity category
-    @param entity_counts: dictionary with the number of entities for each
-        entity category
+    @param entity_counts: vector with the number of entities for each entity
+        category, ordered by settings.entities.ENTITY_IDS_ORDERED
 
     @return: the annotation quality score for the document, and the proportion
         of builtin characters for each entity
     """
-    # count the number of characters for each entity
-    char_counter = {
-        k: {'builtin': 0, 'heuristic': 0}
-        for k in entity_settings.ALL_ENTITY_IDS
-    }
+    # count the number of characters for each entity in two flat vectors
+    builtin_chars = [0.0] * NUM_ENTITY_IDS
+    heuristic_chars = [0.0] * NUM_ENTITY_IDS
 
     for col_decision in colorization_decisions:
-        category_id = col_decision.entity_decision
+        text = col_decision.text
 
-        if col_decision.text is None:
+        if text is None:
             # we assign text length 1 to entity categories that do not have
             # text (this only concerns tables and figures which are always
             # builtins)
             text_len = 1.0
         else:
-            text_len = len(col_decision.text)
+            text_len = len(text)
 
-        if col_decision.decision_source in annotation_settings.BUILTIN_SOURCES:
-            char_counter[category_id]['builtin'] += text_len
+        col = ENTITY_ID_TO_COL[col_decision.entity_decision]
+        if col_decision.decision_source in BUILTIN_SOURCES:
+            builtin_chars[col] += text_len
         else:
-            char_counter[category_id]['heuristic'] += text_len
-
-    # compute proportion of builtin characters for each entity
-    builtin_props = dict.fromkeys(entity_settings.ALL_ENTITY_IDS, 0.0)
-
-    for cat_id, char_counts in char_counter.items():
-        total_chars = char_counts['builtin'] + char_counts['heuristic']
+            heuristic_chars[col] += text_len
 
-        if total_chars == 0:
-            prop = 0.0
-        else:
-            prop = char_counts['builtin'] / total_chars
+    builtin_chars = np.asarray(builtin_chars, dtype=np.float64)
+    total_chars = builtin_chars + np.asarray(heuristic_chars, dtype=np.float64)
 
-        builtin_props[cat_id] = prop
+    # compute proportion of builtin characters for each entity
+    props = np.divide(
+        builtin_chars, total_chars,
+        out=np.zeros(NUM_ENTITY_IDS, dtype=np.float64),
+        where=total_chars > 0
+    )
+    props_list = props.tolist()
+    builtin_props = {
+        cat_id: props_list[ENTITY_ID_TO_COL[cat_id]]
+        for cat_id in entity_settings.ALL_ENTITY_IDS
+    }
 
     # compute final score
-    num_entities = sum(entity_counts.values())
+    num_entities = int(entity_counts.sum())
 
     if num_entities == 0:
         return 0.0, builtin_props
 
-    quality_score = 0.0
-    for entity_id, count in entity_counts.items():
-        if entity_id not in IGNORE_ENTITY_IDS:
-            quality_score += count * builtin_props[entity_id]
-
+    quality_score = float((entity_counts * props * IGNORE_MASK).sum())
     quality_score /= num_entities
 
     return quality_score, builtin_props
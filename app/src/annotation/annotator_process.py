@@ -9,6 +9,7 @@ from typing import Dict, Tuple, List, Any
 import json
 import docx
 import multiprocessing as mp
+import numpy as np
 import gc
 from docx.document import Document
 import logging
@@ -40,6 +41,27 @@ import settings.filesystem as fs_settings
 STATUS_SUCCESS = "SUCCESS"
 STATUS_FAIL = "FAIL"
 
+# metadata count columns, in the canonical entity id order
+ENTITY_COUNT_COLUMNS = tuple(
+    "num_" + settings.entities.ENTITY_ID_TO_NAME[entity_id]
+    for entity_id in settings.entities.ENTITY_IDS_ORDERED
+)
+
+
+def count_entities(entities: Dict[int, List[Entity]]) -> np.ndarray:
+    r""" Count the entities per entity category.
+
+    @param entities: dictionary with entity_category_id as key and list of
+        entities as value
+
+    @return: vector of entity counts, ordered by
+        settings.entities.ENTITY_IDS_ORDERED
+    """
+    return np.asarray([
+        len(entities.get(entity_id) or [])
+        for entity_id in settings.entities.ENTITY_IDS_ORDERED
+    ], dtype=np.int64)
+
 
 class AnnotatorProcess(mp.Process):
 
@@ -629,16 +651,14 @@ class AnnotatorProcess(mp.Process):
         doc_meta.top_lang = max(doc_langs, key=doc_langs.get)
         doc_meta.top_lang_score = doc_langs[doc_meta.top_lang]
 
-        # get entity counts
-        entity_counts = {}
-        for entity_name in settings.entities.ALL_ENTITY_NAMES:
-            count = sum(
-                getattr(page.metadata, "num_" + entity_name)
-                for page in annotated_pages
-            )
-            setattr(doc_meta, "num_" + entity_name, count)
-            entity_id = settings.entities.ENTITY_NAME_TO_ID[entity_name]
-            entity_counts[entity_id] = count
+        # get entity counts; these are summed from the page entities directly
+        # instead of reading back the per page metadata columns
+        entity_counts = sum(
+            (count_entities(page.entities) for page in annotated_pages),
+            start=np.zeros(len(ENTITY_COUNT_COLUMNS), dtype=np.int64)
+        )
+        for column, count in zip(ENTITY_COUNT_COLUMNS, entity_counts.tolist()):
+            setattr(doc_meta, column, count)
 
         # get quality metrics
         quality_score, builtin_props = calc_annotation_quality_score(
@@ -707,10 +727,9 @@ class AnnotatorProcess(mp.Process):
             page_meta.page_number = get_page_num_from_page_id(page_id)
 
             # get entity counts
-            for entity_name in settings.entities.ALL_ENTITY_NAMES:
-                entity_id = settings.entities.ENTITY_NAME_TO_ID[entity_name]
-                count = len(entities.get(entity_id) or [])
-                setattr(page_meta, f'num_{entity_name}', count)
+            entity_counts = count_entities(entities).tolist()
+            for column, count in zip(ENTITY_COUNT_COLUMNS, entity_counts):
+                setattr(page_meta, column, count)
 
             # get page text
             page_text = DocumentText(text=" ".join(w.text for w in words))
@@ -1,14 +1,16 @@
+import collections
 import dataclasses
-from docx.oxml import CT_R
+import functools
+from docx.oxml.ns import qn
 from docx.shared import RGBColor
 from docx.text.paragraph import Paragraph
 from docx.text.run import Run
-from typing import List, Union, Dict
+from typing import List, Union, Dict, Tuple
 
 from src.annotation.colorization.heuristics.build_heuristics import (
     ParagraphHeuristic
 )
-from src.annotation.utils.color_utils import rgb_to_hex, hsv_to_rgb
+from src.annotation.utils.color_utils import hsv_to_rgb_hex
 from src.annotation.utils.color_utils import shade_element
 from src.annotation.colorization.mappings import CONSIDER_RUN_COLORING_FOR
 
@@ -16,8 +18,53 @@ import settings.colors as color_settings
 import settings.entities as entity_settings
 import settings.annotation as annotation_settings
 
+# hues of the table (header) color spaces; used to map the base color of nested
+# tables back to the table (header) base color
+_TABLE_HUE = color_settings.COLOR_TABLE[0]
+_TABLE_HEADER_HUE = color_settings.COLOR_TABLE_HEADER[0]
 
-@dataclasses.dataclass
+_HYPERLINK_TAG = qn('w:hyperlink')
+_RUN_TAG = qn('w:r')
+
+
+def _color_cycle(base_color: Tuple[int, int, int]) -> Tuple[tuple, ...]:
+    r""" get the colors which are applied in turn for a base color; starting
+    at the base color, the val is decreased by SAT_VAL_STEP as long as it
+    stays above NONTABLE_VAL_MIN, after which the cycle starts over
+
+    @param base_color: a color constant from settings.colors (hsv encoded)
+
+    @return: tuple of hsv colors, starting with the base color
+    """
+    hue, sat, val_base = base_color
+
+    if hue in color_settings.ENTITIES_HUES_WITHOUT_CYCLING:
+        # for these entities, we do not cycle through the color space
+        return (base_color,)
+
+    return (base_color,) + tuple(
+        (hue, sat, val) for val in range(
+            val_base - color_settings.SAT_VAL_STEP,
+            color_settings.NONTABLE_VAL_MIN - 1,
+            -color_settings.SAT_VAL_STEP
+        )
+    )
+
+
+# precomputed color cycles for all base colors
+_COLOR_CYCLES = {
+    base_color: _color_cycle(base_color)
+    for base_color in color_settings.ALL_COLORS
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _entity_id_for(color: Tuple[int, int, int]) -> Union[int, None]:
+    r""" cached entity category id of a (hashable) color constant """
+    return color_settings.get_entity_category_id(color)
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
 class ColorizationDecision:
     r"""
     A colorization decision, which is made by the colorization handler
@@ -46,15 +93,32 @@ class ColorizationHandler:
 
         # base color decision is translated to actual applicable color
         self.color_decision_to_application = {}
+        # position of the applicable color in the color cycle of each base
+        # color
+        self._color_cycle_positions = {}
         # track used colors
         self._used_colors = {}
         for base_color in color_settings.ALL_COLORS:
-            self.color_decision_to_application[str(base_color)] = base_color
-            self._used_colors[str(base_color)] = {base_color}
-
-        # ! A JSON which tracks how a colorization decision was made
-        # see settings.annotation
-        self._colorization_decisions: List[ColorizationDecision] = []
+            self.color_decision_to_application[base_color] = base_color
+            self._color_cycle_positions[base_color] = 0
+            self._used_colors[base_color] = {base_color}
+
+        # font color last assigned to each paragraph style (by style id);
+        # styles are shared between paragraphs, so writing the same color again
+        # can be skipped
+        self._style_colors: Dict[str, RGBColor] = {}
+
+        # parsed properties of the table styles referenced by tables (by style
+        # id); these are the same for all tables referencing a style, so they
+        # are only parsed once per document (see TableColorizationHandler)
+        self.parsed_tbl_styles: Dict[str, tuple] = {}
+
+        # ! tracks how a colorization decision was made, see
+        # settings.annotation; the decisions are stored column-wise and only
+        # turned into ColorizationDecision objects when they are requested
+        self._decision_texts: List[Union[str, None]] = []
+        self._decision_sources: List[str] = []
+        self._decision_entities: List[int] = []
 
     def update_application_color(self, base_color, new_color):
         # for table cells and table header cells, we have a different color
@@ -67,12 +131,12 @@ class ColorizationHandler:
         # starts at the used table cell color; so we need to update the base
         # color to the table color in this case since we want to keep track of
         # it in the table (header) color space
-        if base_color[0] == color_settings.COLOR_TABLE[0]:
+        if base_color[0] == _TABLE_HUE:
             base_color = color_settings.COLOR_TABLE
-        elif base_color[0] == color_settings.COLOR_TABLE_HEADER[0]:
+        elif base_color[0] == _TABLE_HEADER_HUE:
             base_color = color_settings.COLOR_TABLE_HEADER
 
-        self._used_colors[str(base_color)].add(new_color)
+        self._used_colors[base_color].add(new_color)
 
     def update_colorization_decisions(
             self,
@@ -86,33 +150,26 @@ class ColorizationHandler:
         @param decision_source: the source of the entity decision
         @param entity_decision: the id of the entity category
         """
-        self._colorization_decisions.append(ColorizationDecision(
-            text=text,
-            decision_source=decision_source,
-            entity_decision=entity_decision
-        ))
+        self._decision_texts.append(text)
+        self._decision_sources.append(decision_source)
+        self._decision_entities.append(entity_decision)
 
     def __update_application_color(self, base_color):
         r""" Update color to apply during looping procedure """
-        # extract current color tracking state
-        hue, sat, val = self.color_decision_to_application[str(base_color)]
-
-        if hue in color_settings.ENTITIES_HUES_WITHOUT_CYCLING:
+        # step to the next color of the precomputed cycle; only the val is
+        # modified, and we need less steps before reset for regular elements
+        cycle = _COLOR_CYCLES[base_color]
+        if len(cycle) == 1:
             # for these entities, we do not cycle through the color space
             return
 
-        _, sat_base, val_base = base_color
-
-        # only modify the val
-        val -= color_settings.SAT_VAL_STEP
-        # we need less steps before reset for regular elements
-        if val < color_settings.NONTABLE_VAL_MIN:
-            val = val_base
+        position = (self._color_cycle_positions[base_color] + 1) % len(cycle)
+        self._color_cycle_positions[base_color] = position
 
         # save in mapping
-        new_color = (hue, sat, val)
-        self.color_decision_to_application[str(base_color)] = new_color
-        self._used_colors[str(base_color)].add(new_color)
+        new_color = cycle[position]
+        self.color_decision_to_application[base_color] = new_color
+        self._used_colors[base_color].add(new_color)
 
     def assign_par_color(self, par: Paragraph, base_color,
                          run_colorization_mask: List[int] = None,
@@ -128,69 +185,72 @@ class ColorizationHandler:
         @param decision_source: How the colorization decision was made (see
             settings.annotation).
         """
-        if (
-                base_color == color_settings.COLOR_WHITESPACE
-                or par.text.isspace()
-                or len(par.text) == 0
-        ):
+        if base_color == color_settings.COLOR_WHITESPACE:
+            return
+
+        # par.text and par.style are rebuilt on every access
+        par_text = par.text
+        if par_text.isspace() or len(par_text) == 0:
             return
 
         # applying a default style may have side effects
         # although normal style should always be applied in renderer to
         # undef-style paragraphs by default
-        if par.style is None:
+        par_style = par.style
+        if par_style is None:
             return
 
         # get color to actually use
-        color = self.color_decision_to_application[str(base_color)]
+        color = self.color_decision_to_application[base_color]
         # and update for the next appearance of this element
         self.__update_application_color(base_color)
 
-        r, g, b = hsv_to_rgb(hsv_color=color)
-        color_hex = rgb_to_hex(rgb_color=(r, g, b))
+        rgb_color, color_hex = hsv_to_rgb_hex(color)
 
-        colorized_text = par.text
+        colorized_text = par_text
 
         if run_colorization_mask is None:
             shade_element(par._p.get_or_add_pPr(), color_hex=color_hex)
             # colorize font same as background shading
-            par.style.font.color.rgb = RGBColor(r=r, g=g, b=b)
+            style_id = par_style.style_id
+            if (
+                    style_id is None
+                    or self._style_colors.get(style_id) != rgb_color
+            ):
+                par_style.font.color.rgb = rgb_color
+                if style_id is not None:
+                    self._style_colors[style_id] = rgb_color
             for run in par.runs:
                 shade_element(run._r.get_or_add_rPr(), color_hex=color_hex)
-                run.font.color.rgb = RGBColor(r=r, g=g, b=b)
+                run.font.color.rgb = rgb_color
         else:
             # ! only color the runs at index allowed by the mask
             # and do not style the paragraph any extra
             colorized_text = ""
-            for run_index in range(len(par.runs)):
+            run_colorization_mask = set(run_colorization_mask)
+            for run_index, run in enumerate(par.runs):
                 if run_index in run_colorization_mask:
-                    run = par.runs[run_index]
                     colorized_text += run.text
                     if not (run.text.isspace()):
                         shade_element(
                             run._r.get_or_add_rPr(), color_hex=color_hex
                         )
-                        run.font.color.rgb = RGBColor(r=r, g=g, b=b)
+                        run.font.color.rgb = rgb_color
 
         # to deal with rels / hyperlinks in normal text, we can for now just
         # make them the same color as the par
         # !important: This requires us to go directly into the XML, using lxml
         # in python
-        par_xml = par._p
-        for child_element in list(par_xml):
-            if "hyperlink" in child_element.tag:
-                for possible_run in child_element.iterchildren():
-                    if isinstance(possible_run, CT_R):
-                        # now we can colour it normally
-                        run = Run(possible_run, par)
-                        run.font.color.rgb = RGBColor(r=r, g=g, b=b)
-                        shade_element(
-                            run._r.get_or_add_rPr(), color_hex=color_hex
-                        )
+        for hyperlink in par._p.iterchildren(_HYPERLINK_TAG):
+            for hyperlink_run in hyperlink.iterchildren(_RUN_TAG):
+                # now we can colour it normally
+                run = Run(hyperlink_run, par)
+                run.font.color.rgb = rgb_color
+                shade_element(run._r.get_or_add_rPr(), color_hex=color_hex)
 
         # track the colorization of this paragraph
         if decision_source is not None:
-            entity_id = color_settings.get_entity_category_id(str(base_color))
+            entity_id = _entity_id_for(base_color)
             self.update_colorization_decisions(
                 text=colorized_text,
                 decision_source=decision_source,
@@ -216,20 +276,19 @@ class ColorizationHandler:
             return
 
         # get color to actually use
-        color = self.color_decision_to_application[str(base_color)]
+        color = self.color_decision_to_application[base_color]
         # and update for the next appearance of this element
         self.__update_application_color(base_color)
 
-        r, g, b = hsv_to_rgb(hsv_color=color)
-        color_hex = rgb_to_hex(rgb_color=(r, g, b))
+        rgb_color, color_hex = hsv_to_rgb_hex(color)
 
         if decision_source:
             self.update_colorization_decisions(
                 run.text, decision_source,
-                color_settings.get_entity_category_id(str(base_color))
+                _entity_id_for(base_color)
             )
 
-        run.font.color.rgb = RGBColor(r=r, g=g, b=b)
+        run.font.color.rgb = rgb_color
         shade_element(run._r.get_or_add_rPr(), color_hex=color_hex)
 
     def __handle_run_colorization(
@@ -254,10 +313,14 @@ class ColorizationHandler:
         # this should really only be applied if we consider the main color
         # to be the body color
         if maincol in CONSIDER_RUN_COLORING_FOR:
-            for i in range(len(par.runs)):
-                run = par.runs[i]
+            # python-docx rebuilds the run list on every access of par.runs,
+            # and run.text joins the text of all run children, so take a
+            # single snapshot of both
+            prev_text, prev_runcol = None, None
+            for i, run in enumerate(par.runs):
+                run_text = run.text
                 # ! careful not to color whitespace (preserve bbox separation)
-                if len(run.text) != 0:
+                if len(run_text) != 0:
                     # ! no need to perform looping here, as this is handled in
                     # assign_par_color
                     runcol = runcols[i]
@@ -269,27 +332,29 @@ class ColorizationHandler:
                     # they immediately follow a carriage return
                     if runcol in color_settings.COLORS_SECTION_HEADINGS:
                         if (
-                                i != 0
-                                and (runcols[i - 1] != runcol)
-                                and (not par.runs[i - 1].text.endswith('\r'))
+                                prev_text is not None
+                                and (prev_runcol != runcol)
+                                and (not prev_text.endswith('\r'))
                         ):
                             runcol = maincol
 
-                    # again go to actual applicable color
-                    runcol_cycled = self.color_decision_to_application[
-                        str(runcol)
-                    ]
-                    r, g, b = hsv_to_rgb(hsv_color=runcol_cycled)
-                    color_hex = rgb_to_hex(rgb_color=(r, g, b))
-
                     # check if this leads to creation of a new element
-                    if (runcol != maincol) and (not run.text.isspace()):
+                    if (runcol != maincol) and (not run_text.isspace()):
+                        # again go to actual applicable color; this has to be
+                        # looked up per run since it cycles with every
+                        # colorized run
+                        runcol_cycled = self.color_decision_to_application[
+                            runcol
+                        ]
+                        rgb_color, color_hex = hsv_to_rgb_hex(runcol_cycled)
                         shade_element(
                             run._r.get_or_add_rPr(), color_hex=color_hex
                         )
-                        run.font.color.rgb = RGBColor(r=r, g=g, b=b)
+                        run.font.color.rgb = rgb_color
                         self.__update_application_color(runcol)
 
+                prev_text, prev_runcol = run_text, runcols[i]
+
     def assign_par_color_considering_runs(
             self,
             par: Paragraph,
@@ -321,16 +386,15 @@ class ColorizationHandler:
             par, potential_color, potential_run_colors
         )
 
-        for run_index in range(len(par.runs)):
-            run = par.runs[run_index]
-            recommended_entity_id = color_settings.get_entity_category_id(
-                color=potential_run_colors[run_index]
-            )
+        for run, run_color in zip(par.runs, potential_run_colors):
+            recommended_entity_id = _entity_id_for(run_color)
 
             # no recommendation made
             if recommended_entity_id is None:
                 continue
 
+            run_text = run.text
+
             # if the original was builtin, we need to consider the
             # whether the run was recognized the same as the original
             # entity
@@ -341,7 +405,7 @@ class ColorizationHandler:
                 # for every run that is not the same as builtin --> track
                 # as heuristic that created it
                 self.update_colorization_decisions(
-                    text=run.text,
+                    text=run_text,
                     decision_source=decision_source,
                     entity_decision=recommended_entity_id
                 )
@@ -352,7 +416,7 @@ class ColorizationHandler:
                 # run was builtin and did not get overridden --> track as
                 # builtin
                 self.update_colorization_decisions(
-                    text=run.text,
+                    text=run_text,
                     decision_source=annotation_settings.ANNOTATION_BUILTIN,
                     entity_decision=original_builtin_entity_id
                 )
@@ -360,7 +424,7 @@ class ColorizationHandler:
                 # original was not builtin --> track all runs as respective
                 # heuristic decision
                 self.update_colorization_decisions(
-                    text=run.text,
+                    text=run_text,
                     decision_source=decision_source,
                     entity_decision=recommended_entity_id
                 )
@@ -371,25 +435,32 @@ class ColorizationHandler:
 
         @return: Dict of annotation_source to count
         """
-        source_counts = dict.fromkeys(
+        source_counts = collections.Counter(dict.fromkeys(
             annotation_settings.DECISION_SOURCES + [
                 "text_builtin", "text_fallback"
             ], 0
-        )
+        ))
 
-        for col_decision in self._colorization_decisions:
-            if col_decision.entity_decision == entity_settings.ENTITY_TEXT_ID:
-                if col_decision.decision_source == \
-                        annotation_settings.ANNOTATION_BUILTIN:
-                    decision_source = "text_builtin"
-                else:
-                    decision_source = "text_fallback"
-            else:
-                decision_source = col_decision.decision_source
+        text_id = entity_settings.ENTITY_TEXT_ID
+        builtin_source = annotation_settings.ANNOTATION_BUILTIN
+
+        # text decisions are split by whether they come from builtin styles
+        decision_sources = [
+            (
+                "text_builtin" if source == builtin_source
+                else "text_fallback"
+            ) if entity_id == text_id else source
+            for source, entity_id in zip(
+                self._decision_sources, self._decision_entities
+            )
+        ]
 
-            source_counts[decision_source] += len(col_decision.text or "")
+        for decision_source, text in zip(
+                decision_sources, self._decision_texts
+        ):
+            source_counts[decision_source] += len(text or "")
 
-        return source_counts
+        return dict(source_counts)
 
     @property
     def used_colors(self):
@@ -400,5 +471,15 @@ class ColorizationHandler:
         return self._used_colors
 
     @property
-    def colorization_decisions(self):
-        return self._colorization_decisions
+    def colorization_decisions(self) -> List[ColorizationDecision]:
+        return [
+            ColorizationDecision(
+                text=text,
+                decision_source=decision_source,
+                entity_decision=entity_decision
+            ) for text, decision_source, entity_decision in zip(
+                self._decision_texts,
+                self._decision_sources,
+                self._decision_entities
+            )
+        ]
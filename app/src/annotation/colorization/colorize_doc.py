@@ -1,6 +1,9 @@
 import pathlib
 from typing import Union
 from docx.document import Document as DocxDocument
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
 
 from src.annotation.colorization import (
     ColorizationHandler,
@@ -18,6 +21,9 @@ from src.annotation.utils.color_utils import sanitize_figure_settings
 
 import settings.colors as color_settings
 
+_P_TAG = qn('w:p')
+_TBL_TAG = qn('w:tbl')
+
 
 def colorize_word_doc(
         word_doc: DocxDocument,
@@ -43,6 +49,12 @@ def colorize_word_doc(
     # applied which could change the color of figures
     sanitize_figure_settings(document=word_doc)
 
+    # ! the steps below run sequentially on purpose: they share the color
+    # ! cycling state of the colorization handler, so their order determines
+    # ! the colors assigned, and python-docx / lxml tree mutations hold the GIL
+    # ! so threads would not run them in parallel. Documents are parallelized
+    # ! across annotator processes instead.
+
     # 1) colorize headers and footers
     colorize_header_and_footer(
         word_doc, colorization_handler=colorization_handler
@@ -54,17 +66,22 @@ def colorize_word_doc(
         colorization_handler=colorization_handler
     )
 
-    # 3) colorize tables
-    for table in word_doc.tables:
-        colorize_table(table, colorization_handler=colorization_handler)
-
-    # 4) colorize paragraph elements
-    for paragraph in word_doc.paragraphs:
-        colorize_paragraph(
-            paragraph,
-            colorization_handler=colorization_handler,
-            paragraph_heuristics=paragraph_heuristics
-        )
+    # 3) + 4) colorize tables and paragraph elements; both are collected in a
+    # single pass over the body. Tables only cycle through the table (header)
+    # color space, so interleaving them with paragraphs does not change the
+    # colors assigned to either.
+    body = word_doc._body
+    for block in body._element.iterchildren(_P_TAG, _TBL_TAG):
+        if block.tag == _TBL_TAG:
+            colorize_table(
+                Table(block, body), colorization_handler=colorization_handler
+            )
+        else:
+            colorize_paragraph(
+                Paragraph(block, body),
+                colorization_handler=colorization_handler,
+                paragraph_heuristics=paragraph_heuristics
+            )
 
     # 5) colorize table of contents elements
     # ! this has to be done before forms, due to XML overlaps
@@ -1,12 +1,60 @@
-from docx.oxml.xmlchemy import serialize_for_reading
+from docx.oxml.ns import qn
 from docx.text.paragraph import Paragraph
+from lxml import etree
+from typing import Tuple
 
 import settings
 from src.annotation.builtin_styles import BUILTIN_STYLES
 from src.annotation.colorization import ColorizationHandler
 from src.annotation.colorization import ParagraphHeuristic
 from src.annotation.colorization.mappings import MAP_BUILTIN_TO_ENTITY_COLOR
-from src.annotation.utils.color_utils import check_if_par_is_numbered
+
+# builtin style name --> entity color (None if the style is not mapped to an
+# entity); resolved once for all builtin styles, taking the longest matching
+# prefix of MAP_BUILTIN_TO_ENTITY_COLOR
+_SORTED_BUILTIN_PREFIXES = tuple(sorted(
+    MAP_BUILTIN_TO_ENTITY_COLOR.items(), key=lambda kv: -len(kv[0])
+))
+_BUILTIN_STYLE_TO_ENTITY_COLOR = {
+    style: next(
+        (col for prefix, col in _SORTED_BUILTIN_PREFIXES
+         if style.startswith(prefix)), None
+    )
+    for style in BUILTIN_STYLES
+}
+# marks styles which are not builtin styles
+_NOT_BUILTIN = object()
+
+# characters which do not count as paragraph text
+_DROP_NEWLINE_AND_TAB = str.maketrans('', '', '\n\t')
+
+# office math elements which mark a paragraph as an equation
+_MATH_TAGS = (qn('m:oMath'), qn('m:oMathPara'))
+# numbering properties which mark a paragraph as a list item
+_NUM_PR_TAG = qn('w:numPr')
+_P_PR_TAG = qn('w:pPr')
+
+
+def _classify_paragraph(p_elem: etree._Element) -> Tuple[bool, bool]:
+    r""" Check whether a paragraph contains an equation and whether it is
+    numbered, in a single walk over the paragraph xml.
+
+    @param p_elem: the w:p element of the paragraph
+
+    @return: tuple (has_math, is_numbered); is_numbered is only meaningful if
+        has_math is False, since the walk stops at the first math element
+    """
+    is_numbered = False
+    for elem in p_elem.iter(_NUM_PR_TAG, *_MATH_TAGS):
+        if elem.tag == _NUM_PR_TAG:
+            # a list style (even within a normal paragraph!) means numbering
+            # has occured
+            parent = elem.getparent()
+            is_numbered |= parent is not None and parent.tag == _P_PR_TAG
+        else:
+            return True, is_numbered
+
+    return False, is_numbered
 
 
 def colorize_paragraph(
@@ -23,17 +71,23 @@ def colorize_paragraph(
     @param paragraph_heuristics: the paragraph heuristics
     """
     # skip paragraph if it has no style associated
-    if paragraph.style is None:
+    style = paragraph.style
+    if style is None:
         return
 
     # skip paragraph if it is empty
-    par_style = paragraph.style.name.lower()
-    par_text = "".join(s for s in paragraph.text if s not in ["\n", "\t"])
+    par_style = style.name.lower()
+    par_text = paragraph.text.translate(_DROP_NEWLINE_AND_TAB)
     if len(par_text) == 0 and "toc" not in par_style:
         return
 
+    # check the builtin --> entity mapping
+    entity_color_found_for_builtin = _BUILTIN_STYLE_TO_ENTITY_COLOR.get(
+        par_style, _NOT_BUILTIN
+    )
+
     # if no built-in style, we can try to fall back to heuristics
-    if par_style not in BUILTIN_STYLES:
+    if entity_color_found_for_builtin is _NOT_BUILTIN:
         colorization_handler.assign_par_color_considering_runs(
             paragraph, paragraph_heuristics,
             original_was_builtin=False,
@@ -41,27 +95,18 @@ def colorize_paragraph(
         )
         return
 
-    # check the builtin --> entity mapping
-    entity_color_found_for_builtin = None
-    for possible_start in MAP_BUILTIN_TO_ENTITY_COLOR:
-        if par_style.startswith(possible_start):
-            entity_color_found_for_builtin = \
-                MAP_BUILTIN_TO_ENTITY_COLOR[possible_start]
-
     # ! some entity types we want to deal with specially
     # ! this may include run-checking or detecting other entity signals
     if entity_color_found_for_builtin == settings.colors.COLOR_TEXT:
-        attributes = set(
-            paragraph._p.xml._attr_seq(serialize_for_reading(paragraph._p))
-        )
+        has_math, is_numbered = _classify_paragraph(paragraph._p)
 
-        if "</m:oMath>" in attributes or "</m:oMathPara>" in attributes:
+        if has_math:
             colorization_handler.assign_par_color(
                 par=paragraph,
                 base_color=settings.colors.COLOR_EQUATION,
                 decision_source=settings.annotation.ANNOTATION_XML_PATTERN
             )
-        elif check_if_par_is_numbered(paragraph):
+        elif is_numbered:
             colorization_handler.assign_par_color(
                 par=paragraph,
                 base_color=settings.colors.COLOR_LIST,
@@ -1,7 +1,8 @@
 import dataclasses
-from typing import Dict, Type
+import functools
+from typing import Dict, Tuple, Type
 
-from docx.oxml.ns import qn
+from docx.oxml.ns import nsmap, qn
 from lxml import etree
 
 from src.annotation.colorization.entities.tables import styles
@@ -17,6 +18,48 @@ __all__ = [
     'parse_tbl_look_element'
 ]
 
+# (field name, qualified attribute name) pairs of the attributes classes which
+# are parsed from xml element attributes; computed once instead of calling
+# dataclasses.fields and qn per parsed element
+_QN_FIELDS: Dict[type, Tuple[Tuple[str, str], ...]] = {
+    cls: tuple((f.name, qn(f"w:{f.name}")) for f in dataclasses.fields(cls))
+    for cls in (
+        styles.BorderAttributes,
+        styles.ShdAttributes,
+        styles.TableLookAttributes
+    )
+}
+
+# border names of the table and table cell borders
+_TBL_BORDER_NAMES = tuple(
+    f.name for f in dataclasses.fields(styles.TableBorders)
+)
+_TC_BORDER_NAMES = tuple(
+    f.name for f in dataclasses.fields(styles.TableCellBorders)
+)
+
+# compiled xpaths to the conditional formatting of a table style
+_W_NAMESPACES = {'w': nsmap['w']}
+_XP_TBL_STYLE_PR = etree.XPath('./w:tblStylePr', namespaces=_W_NAMESPACES)
+_XP_TC_PR = etree.XPath('./w:tcPr[1]', namespaces=_W_NAMESPACES)
+_XP_TBL_PR = etree.XPath('./w:tblPr[1]', namespaces=_W_NAMESPACES)
+_W_TYPE = qn('w:type')
+
+
+# borders and shading repeat across the cells of a table and across documents,
+# so equal attributes are parsed into shared instances; these are never
+# modified in place (see utils.fill_border_style and utils.fill_shd_style)
+_cached_border_attributes = functools.lru_cache(maxsize=4096)(
+    styles.BorderAttributes
+)
+_cached_shd_attributes = functools.lru_cache(maxsize=4096)(
+    styles.ShdAttributes
+)
+
+
+def _first(elements: list) -> etree._Element:
+    return elements[0] if elements else None
+
 
 def parse_ref_conditional_styles(
         style_etree: etree._Element
@@ -26,16 +69,16 @@ def parse_ref_conditional_styles(
     if style_etree is None:
         return conditional_styles
 
-    for tbl_style_pr in style_etree.iterfind(qn('w:tblStylePr')) or []:
+    for tbl_style_pr in _XP_TBL_STYLE_PR(style_etree):
         # get region (=type) where conditional formatting is applied
-        _type = tbl_style_pr.attrib.get(qn('w:type'))
+        _type = tbl_style_pr.attrib.get(_W_TYPE)
 
         # get table cell properties
-        tc_pr_elem = tbl_style_pr.find(qn('w:tcPr'))
+        tc_pr_elem = _first(_XP_TC_PR(tbl_style_pr))
         tc_pr_obj = parse_tc_pr_element(tc_pr_elem)
 
         # get table properties
-        tbl_pr_elem = tbl_style_pr.find(qn('w:tblPr'))
+        tbl_pr_elem = _first(_XP_TBL_PR(tbl_style_pr))
         tbl_pr_obj = parse_tbl_pr_element(tbl_pr_elem)
 
         # create TableStyleProperty object
@@ -96,10 +139,10 @@ def parse_tbl_borders_element(
     tbl_border_attrs = parse_borders_element(tbl_borders_elem)
 
     return styles.TableBorders(**{
-        f.name: tbl_border_attrs.get(
-            f.name, styles.BorderAttributes.init_zero()
+        name: tbl_border_attrs.get(
+            name, styles.BorderAttributes.init_zero()
         )
-        for f in dataclasses.fields(styles.TableBorders)
+        for name in _TBL_BORDER_NAMES
     })
 
 
@@ -112,10 +155,10 @@ def parse_tc_borders_element(
     tc_border_attrs = parse_borders_element(tc_borders_elem)
 
     return styles.TableCellBorders(**{
-        f.name: tc_border_attrs.get(
-            f.name, styles.BorderAttributes.init_zero()
+        name: tc_border_attrs.get(
+            name, styles.BorderAttributes.init_zero()
         )
-        for f in dataclasses.fields(styles.TableCellBorders)
+        for name in _TC_BORDER_NAMES
     })
 
 
@@ -123,17 +166,17 @@ def parse_borders_element(
         borders_elem: etree._Element
 ) -> Dict[str, styles.BorderAttributes]:
     borders_dict = {}
+    qn_fields = _QN_FIELDS[styles.BorderAttributes]
 
     for border in borders_elem.iterchildren():
         # build border attributes
-        border_attrs = styles.BorderAttributes(
-            **{
-                f.name: border.attrib.get(qn(f"w:{f.name}"))
-                for f in dataclasses.fields(styles.BorderAttributes)
-            }
+        attrib = border.attrib
+        border_attrs = _cached_border_attributes(
+            *[attrib.get(q) for _, q in qn_fields]
         )
 
-        border_name = etree.QName(border).localname
+        # local name of the border, without allocating a QName
+        border_name = border.tag.rpartition('}')[2]
         borders_dict[border_name] = border_attrs
 
     return borders_dict
@@ -142,7 +185,13 @@ def parse_borders_element(
 def parse_shd_element(
         shd_elem: etree._Element
 ) -> styles.ShdAttributes:
-    return _parse_element(shd_elem, styles.ShdAttributes)
+    if shd_elem is None:
+        return styles.ShdAttributes.init_zero()
+
+    attrib = shd_elem.attrib
+    return _cached_shd_attributes(
+        *[attrib.get(q) for _, q in _QN_FIELDS[styles.ShdAttributes]]
+    )
 
 
 def parse_tbl_look_element(
@@ -158,7 +207,7 @@ def _parse_element(
     if elem is None:
         return style_obj.init_zero()
 
+    attrib = elem.attrib
     return style_obj(**{
-        f.name: elem.attrib.get(qn(f"w:{f.name}"))
-        for f in dataclasses.fields(style_obj)
+        name: attrib.get(q) for name, q in _QN_FIELDS[style_obj]
     })
@@ -1,35 +1,66 @@
 import dataclasses
+import re
 
 from typing import TypeVar
 
 AttributesBaseType = TypeVar("AttributesBaseType", bound="AttributesBase")
 
+# valid color values; hex values without leading # or auto
+_match_color = re.compile(r"\A(?:[0-9A-Fa-f]{6}|auto)\Z").match
+
+# valid values of on / off attributes, shared by all such fields
+_ON_OFF_VALS = frozenset({None, "true", "false", "0", "1"})
+_ON_VALS = frozenset({"true", "1"})
+_OFF_VALS = frozenset({"false", "0"})
+
 
 @dataclasses.dataclass
 class AttributesBase:
     r""" Base class for all attributes classes. """
 
+    # no instance dict; subclasses declare their fields as slots
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # precompute (name, type, valid values) for all fields of the class;
+        # this runs before the dataclass decorator, so the fields are read
+        # from the annotations of the class body
+        cls.__validators__ = tuple(
+            (name, field_type, getattr(cls, f"__{name}_vals__", None))
+            for name, field_type in cls.__dict__.get(
+                "__annotations__", {}
+            ).items()
+        )
+        cls.__has_color__ = "color" in getattr(cls, "__slots__", ())
+        # positional arguments of an all-None instance
+        cls.__zero_args__ = (None,) * len(cls.__validators__)
+
     def __post_init__(self):
+        # the checks below only consist of assertions; skip them altogether
+        # when running with -O (run without -O to debug the schema parsing)
+        if not __debug__:
+            return
+
         # check that all values are in valid ranges
-        for field in dataclasses.fields(self):
-            val_range = getattr(self, f"__{field.name}_vals__")
-            val = getattr(self, field.name)
+        for name, field_type, val_range in self.__validators__:
+            val = getattr(self, name)
 
             if val_range is None or val is None:
                 continue
 
-            assert field.type(getattr(self, field.name)) in val_range, \
-                f"Invalid value for {field.name}: {getattr(self, field.name)}"
+            assert field_type(val) in val_range, \
+                f"Invalid value for {name}: {val}"
 
         # check that color attributed is a valid hex value (without leading #)
-        color = getattr(self, "color", None)
-        if color is not None:
-            assert len(color) == 6 or color == "auto", \
+        if self.__has_color__:
+            color = self.color
+            assert color is None or _match_color(color), \
                 f"Invalid color value: {color}"
 
     @classmethod
     def init_zero(cls):
-        return cls(**{k: None for k in cls.__slots__})
+        return cls(*cls.__zero_args__)
 
 
 @dataclasses.dataclass
@@ -65,7 +96,7 @@ class BorderAttributes(AttributesBase):
     # Specifies the style of the border. Table borders can be only line
     # borders.
     val: str
-    __val_vals__ = [
+    __val_vals__ = frozenset({
         "single", "dashDotStroked", "dashed", "dashSmallGap", "dotDash",
         "dotDotDash", "dotted", "double", "doubleWave", "inset", "nil", "none",
         "outset", "thick", "thickThinLargeGap", "thickThinMediumGap",
@@ -73,7 +104,7 @@ class BorderAttributes(AttributesBase):
         "thinThickSmallGap", "thinThickThinLargeGap", "thinThickThinMediumGap",
         "thinThickThinSmallGap", "threeDEmboss", "threeDEngrave", "triple",
         "wave"
-    ]
+    })
 
     # Specifies whether the border should be modified to create the appearance
     # of a shadow. For right and bottom borders, this is done by duplicating
@@ -81,7 +112,7 @@ class BorderAttributes(AttributesBase):
     # borders, this is done by moving the border down and to the right of the
     # original location. Permitted values are true and false.
     shadow: str
-    __shadow_vals__ = [None, "true", "false"]
+    __shadow_vals__ = frozenset({None, "true", "false"})
 
     __slots__ = ("color", "space", "sz", "val", "shadow")
 
@@ -110,7 +141,7 @@ class ShdAttributes(AttributesBase):
     # background color. For example, w:val="pct10" indicates that the border
     # style is a 10 percent foreground fill mask.
     val: str
-    __val_vals__ = [
+    __val_vals__ = frozenset({
         "clear", "diagCross", "diagStripe", "horzCross", "horzStripe", "nil",
         "pct10", "pct12", "pct15", "pct20", "pct25", "pct30", "pct35", "pct37",
         "pct40", "pct45", "pct5", "pct50", "pct55", "pct60", "pct62", "pct65",
@@ -118,7 +149,7 @@ class ShdAttributes(AttributesBase):
         "reverseDiagStripe", "thinDiagCross", "thinDiagStripe",
         "thinHorzCross", "thinHorzStripe", "thinReverseDiagStripe",
         "thinVertStripe", "vertStripe",
-    ]
+    })
 
     # Specifies the color to be used for the background. Values are given as
     # hex values (i.e., in RRGGBB format). No # in included, unlike hex values
@@ -131,6 +162,14 @@ class ShdAttributes(AttributesBase):
     __slots__ = ("color", "val", "fill")
 
 
+# all-None border and shading attributes which are shared by the zero
+# initialized borders and properties below; these must not be modified
+_ZERO_BORDER = BorderAttributes(
+    color=None, space=None, sz=None, val=None, shadow=None
+)
+_ZERO_SHD = ShdAttributes(color=None, val=None, fill=None)
+
+
 @dataclasses.dataclass
 class TableLookAttributes(AttributesBase):
     r""" Attributes of table look which defines how conditional formatting is
@@ -148,48 +187,50 @@ class TableLookAttributes(AttributesBase):
     """
     # Specifies that the first row conditional formatting should be applied.
     firstRow: str
-    __firstRow_vals__ = [None, "true", "false", "0", "1"]
+    __firstRow_vals__ = _ON_OFF_VALS
 
     # Specifies that the first column conditional formatting should be applied.
     firstColumn: str
-    __firstColumn_vals__ = [None, "true", "false", "0", "1"]
+    __firstColumn_vals__ = _ON_OFF_VALS
 
     # Specifies that the last row conditional formatting should be applied.
     lastRow: str
-    __lastRow_vals__ = [None, "true", "false", "0", "1"]
+    __lastRow_vals__ = _ON_OFF_VALS
 
     # Specifies that the last column conditional formatting should be applied.
     lastColumn: str
-    __lastColumn_vals__ = [None, "true", "false", "0", "1"]
+    __lastColumn_vals__ = _ON_OFF_VALS
 
     # Specifies that the horizontal banding conditional formatting should not
     # be applied.
     noHBand: str
-    __noHBand_vals__ = [None, "true", "false", "0", "1"]
+    __noHBand_vals__ = _ON_OFF_VALS
 
     # Specifies that the vertical banding conditional formatting should not be
     # applied.
     noVBand: str
-    __noVBand_vals__ = [None, "true", "false", "0", "1"]
+    __noVBand_vals__ = _ON_OFF_VALS
 
     # standard 2003 compatibility
     val: str
     __val_vals__ = None
 
+    # use_conditional_styling is derived from the fields in __post_init__
     __slots__ = ("firstRow", "firstColumn", "lastRow", "lastColumn", "noHBand",
-                 "noVBand", "val")
+                 "noVBand", "val", "use_conditional_styling")
 
     positive_attrs = ("firstRow", "firstColumn", "lastRow", "lastColumn")
     negative_attrs = ("noHBand", "noVBand")
 
     def __post_init__(self):
         # determine if conditional styling is used
-        self.use_conditional_styling = any(
-            getattr(self, attr) in ["true", "1"]
-            for attr in self.positive_attrs
-        ) or any(
-            getattr(self, attr) in ["false", "0"]
-            for attr in self.negative_attrs
+        self.use_conditional_styling = (
+                self.firstRow in _ON_VALS
+                or self.firstColumn in _ON_VALS
+                or self.lastRow in _ON_VALS
+                or self.lastColumn in _ON_VALS
+                or self.noHBand in _OFF_VALS
+                or self.noVBand in _OFF_VALS
         )
 
 
@@ -253,46 +294,50 @@ class CnfStyle(AttributesBase):
     __val_vals__ = None
 
     firstRow: str
-    __firstRow_vals__ = [None, "true", "false", "0", "1"]
+    __firstRow_vals__ = _ON_OFF_VALS
 
     lastRow: str
-    __lastRow_vals__ = [None, "true", "false", "0", "1"]
+    __lastRow_vals__ = _ON_OFF_VALS
 
     firstColumn: str
-    __firstColumn_vals__ = [None, "true", "false", "0", "1"]
+    __firstColumn_vals__ = _ON_OFF_VALS
 
     lastColumn: str
-    __lastColumn_vals__ = [None, "true", "false", "0", "1"]
+    __lastColumn_vals__ = _ON_OFF_VALS
 
     oddVBand: str
-    __oddVBand_vals__ = [None, "true", "false", "0", "1"]
+    __oddVBand_vals__ = _ON_OFF_VALS
 
     evenVBand: str
-    __evenVBand_vals__ = [None, "true", "false", "0", "1"]
+    __evenVBand_vals__ = _ON_OFF_VALS
 
     oddHBand: str
-    __oddHBand_vals__ = [None, "true", "false", "0", "1"]
+    __oddHBand_vals__ = _ON_OFF_VALS
 
     evenHBand: str
-    __evenHBand_vals__ = [None, "true", "false", "0", "1"]
+    __evenHBand_vals__ = _ON_OFF_VALS
 
     firstRowFirstColumn: str
-    __firstRowFirstColumn_vals__ = [None, "true", "false", "0", "1"]
+    __firstRowFirstColumn_vals__ = _ON_OFF_VALS
 
     firstRowLastColumn: str
-    __firstRowLastColumn_vals__ = [None, "true", "false", "0", "1"]
+    __firstRowLastColumn_vals__ = _ON_OFF_VALS
 
     lastRowFirstColumn: str
-    __lastRowFirstColumn_vals__ = [None, "true", "false", "0", "1"]
+    __lastRowFirstColumn_vals__ = _ON_OFF_VALS
 
     lastRowLastColumn: str
-    __lastRowLastColumn_vals__ = [None, "true", "false", "0", "1"]
+    __lastRowLastColumn_vals__ = _ON_OFF_VALS
 
     __slots__ = ("val", "firstRow", "lastRow", "firstColumn", "lastColumn",
                  "oddVBand", "evenVBand", "oddHBand", "evenHBand",
                  "firstRowFirstColumn", "firstRowLastColumn",
                  "lastRowFirstColumn", "lastRowLastColumn")
 
+    # the fields encoded by the characters of val, in order
+    __fields_after_val__ = __slots__[1:]
+    __num_fields_after_val__ = len(__fields_after_val__)
+
     def __post_init__(self):
         self.parse_val()
 
@@ -300,10 +345,11 @@ class CnfStyle(AttributesBase):
         if self.val is None:
             return
 
-        assert isinstance(self.val, str)
-        assert len(self.val) == len(self.__slots__) - 1
+        if __debug__:
+            assert isinstance(self.val, str)
+            assert len(self.val) == self.__num_fields_after_val__
 
-        for v, field in zip(self.val, self.__slots__[1:]):
+        for v, field in zip(self.val, self.__fields_after_val__):
             if getattr(self, field) is None:
                 setattr(self, field, v)
 
@@ -318,10 +364,11 @@ class TableBorders:
     insideV: BorderAttributes
 
     __slots__ = ("top", "left", "bottom", "right", "insideH", "insideV")
+    __zero_borders__ = (_ZERO_BORDER,) * len(__slots__)
 
     @classmethod
     def init_zero(cls):
-        return cls(**{k: BorderAttributes.init_zero() for k in cls.__slots__})
+        return cls(*cls.__zero_borders__)
 
 
 @dataclasses.dataclass
@@ -337,10 +384,11 @@ class TableCellBorders:
 
     __slots__ = ("top", "left", "bottom", "right", "insideH", "insideV",
                  "tl2br", "tr2bl")
+    __zero_borders__ = (_ZERO_BORDER,) * len(__slots__)
 
     @classmethod
     def init_zero(cls):
-        return cls(**{k: BorderAttributes.init_zero() for k in cls.__slots__})
+        return cls(*cls.__zero_borders__)
 
 
 @dataclasses.dataclass
@@ -348,11 +396,13 @@ class TableProperty:
     tbl_borders: TableBorders
     tbl_shd: ShdAttributes
 
+    __slots__ = ("tbl_borders", "tbl_shd")
+
     @classmethod
     def init_zero(cls):
         return cls(
             tbl_borders=TableBorders.init_zero(),
-            tbl_shd=ShdAttributes.init_zero()
+            tbl_shd=_ZERO_SHD
         )
 
 
@@ -361,11 +411,13 @@ class TableCellProperty:
     tc_borders: TableCellBorders
     tc_shd: ShdAttributes
 
+    __slots__ = ("tc_borders", "tc_shd")
+
     @classmethod
     def init_zero(cls):
         return cls(
             tc_borders=TableCellBorders.init_zero(),
-            tc_shd=ShdAttributes.init_zero()
+            tc_shd=_ZERO_SHD
         )
 
 
@@ -375,6 +427,8 @@ class TableStyleProperty:
     table_property: TableProperty
     table_cell_property: TableCellProperty
 
+    __slots__ = ("type", "table_property", "table_cell_property")
+
     @classmethod
     def init_zero(cls, _type: str):
         return cls(
@@ -428,6 +482,15 @@ class ConditionalStyles:
 
     @classmethod
     def init_zero(cls):
-        return cls(**{
-            k: TableStyleProperty.init_zero(_type=k) for k in cls.__slots__
-        })
+        # most tables only define a few conditional formatting types, so the
+        # zero styles are only built when a type is accessed (see __getattr__)
+        return cls.__new__(cls)
+
+    def __getattr__(self, name):
+        # only called for slots which have not been set yet
+        if name not in self.__slots__:
+            raise AttributeError(name)
+
+        style_property = TableStyleProperty.init_zero(_type=name)
+        setattr(self, name, style_property)
+        return style_property
@@ -2,20 +2,52 @@ from lxml import etree
 from typing import Tuple, Callable, Union
 
 from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
+from docx.oxml.ns import nsmap, qn
 from docx.oxml.styles import CT_Style
 from docx.oxml.table import CT_Tbl, CT_Tc, CT_Row
 from docx.shared import RGBColor
 from docx.table import _Cell
+from docx.text.run import Run
 
 from src.annotation.colorization import ColorizationHandler
 from src.annotation.colorization.entities.tables import styles
 from src.annotation.colorization.entities.tables.element_parsers import *
+from src.annotation.colorization.entities.tables.element_parsers import _first
 from src.annotation.colorization.entities.tables.utils import *
-from src.annotation.utils.color_utils import rgb_to_hex, hsv_to_rgb
+from src.annotation.utils.color_utils import hsv_to_rgb_hex
 
 import settings
 
+# lower bounds of the saturation and value levels of table cell colors
+_SAT_MIN = settings.colors.SAT_MIN
+_VAL_MIN = settings.colors.VAL_MIN
+
+# qualified names of the cell border elements and their attributes, and of
+# the conditional formatting attributes; computed once instead of per cell
+_TC_BORDERS_TAG = qn('w:tcBorders')
+_TC_BORDER_TAGS = tuple(
+    (b, qn(f'w:{b}')) for b in styles.TableCellBorders.__slots__
+)
+_BORDER_ATTR_TAGS = tuple(
+    (attr, qn(f'w:{attr}')) for attr in styles.BorderAttributes.__slots__
+)
+_CNF_ATTR_TAGS = tuple(
+    (attr, qn(f'w:{attr}')) for attr in styles.CnfStyle.__slots__
+)
+_P_TAG = qn('w:p')
+_R_TAG = qn('w:r')
+_TBL_TAG = qn('w:tbl')
+
+# compiled xpaths to the (conditional formatting) properties of rows and cells
+_W_NAMESPACES = {'w': nsmap['w']}
+_XP_TR_CNF_STYLE = etree.XPath(
+    './w:trPr[1]/w:cnfStyle[1]', namespaces=_W_NAMESPACES
+)
+_XP_TC_PR = etree.XPath('./w:tcPr[1]', namespaces=_W_NAMESPACES)
+_XP_CNF_STYLE = etree.XPath('./w:cnfStyle[1]', namespaces=_W_NAMESPACES)
+_XP_TC_BORDERS = etree.XPath('./w:tcBorders[1]', namespaces=_W_NAMESPACES)
+_XP_SHD = etree.XPath('./w:shd[1]', namespaces=_W_NAMESPACES)
+
 
 def _make_color_cycle_step(sat, sat_base, val, val_base, sat_val_step):
     r"""Make a step through the HSV color space. The function returns the new
@@ -35,7 +67,7 @@ def _make_color_cycle_step(sat, sat_base, val, val_base, sat_val_step):
 
     # check if val is below the minimum value; if so, reset value to the base
     # value level and decrease the saturation level.
-    if val < settings.colors.VAL_MIN:
+    if val < _VAL_MIN:
         # reset val
         val = val_base
 
@@ -44,7 +76,7 @@ def _make_color_cycle_step(sat, sat_base, val, val_base, sat_val_step):
 
         # check if sat is below the minimum value; if so, reset saturation to
         # the base saturation level.
-        if sat < settings.colors.SAT_MIN:
+        if sat < _SAT_MIN:
             sat = sat_base  # reset sat
 
     return sat, val
@@ -131,23 +163,36 @@ class TableColorizationHandler:
         hue, sat, val = base_color
         row_idx = row_start_idx
 
-        for row in self._ct_tbl.tr_lst[row_start_idx:]:
+        # tr_lst and tc_lst evaluate an xpath on each access, so the rows and
+        # cells are only looked up once
+        tr_lst = self._ct_tbl.tr_lst
+        total_rows_in_table = len(tr_lst)
+
+        for row in tr_lst[row_start_idx:]:
             if breaking_condition(row):
                 break
 
-            for cell_num, tc in enumerate(row.tc_lst):
+            # row level conditional formatting; this is the same for all cells
+            # of the row, so it is only looked up once per row
+            tr_cnf = _first(_XP_TR_CNF_STYLE(row))
+
+            tc_lst = row.tc_lst
+            total_cells_in_row = len(tc_lst)
+
+            for cell_num, tc in enumerate(tc_lst):
                 # get cell location
                 cell_loc = get_cell_location(
                     cell_num=cell_num, row_num=row_idx,
-                    total_cells_in_row=len(row.tc_lst),
-                    total_rows_in_table=len(self._ct_tbl.tr_lst)
+                    total_cells_in_row=total_cells_in_row,
+                    total_rows_in_table=total_rows_in_table
                 )
 
-                cell_color_rgb = hsv_to_rgb(hsv_color=(hue, sat, val))
-                cell_color_hex = rgb_to_hex(rgb_color=cell_color_rgb)
+                cell_color_rgb, cell_color_hex = hsv_to_rgb_hex(
+                    (hue, sat, val)
+                )
 
                 self.__colorize_cell(
-                    tc, row, hex_color=cell_color_hex,
+                    tc, tr_cnf, hex_color=cell_color_hex,
                     rgb_color=cell_color_rgb, cell_loc=cell_loc
                 )
 
@@ -161,7 +206,11 @@ class TableColorizationHandler:
                     sat, base_color[1], val, base_color[2], sat_val_step
                 )
 
-                # colorize tables in cell
+                # colorize tables in cell; most cells do not contain tables, so
+                # the cell wrapper is only built for those that do
+                if tc.find(_TBL_TAG) is None:
+                    continue
+
                 for table in _Cell(tc, self._ct_tbl).tables:
                     try:
                         table_ref_style = table.style._element
@@ -182,40 +231,38 @@ class TableColorizationHandler:
         return row_idx, (hue, sat, val)
 
     def __colorize_cell(
-            self, tc: CT_Tc, tr: CT_Row, hex_color: str,
-            rgb_color: Tuple[int, int, int], cell_loc: str
+            self, tc: CT_Tc, tr_cnf: Union[etree._Element, None],
+            hex_color: str,
+            rgb_color: RGBColor, cell_loc: str
     ):
         r"""Colorize a cell in a table taking into account to the table styles
         defined in word/document.xml and word/styles.xml.
 
         @param tc: The cell to be colored
-        @param tr: The row of the cell to be colored
+        @param tr_cnf: The cnfStyle element of the cell's row, or None
         @param hex_color: The hex color to be applied to the cell
-        @param rgb_color: The rgb color to be applied to the cell
+        @param rgb_color: The RGBColor to be applied to the cell's runs
         """
-        tc_props_applied = self.__get_tc_props_applied(tc, tr, cell_loc)
+        tc_props_applied = self.__get_tc_props_applied(tc, tr_cnf, cell_loc)
         tc_borders = tc_props_applied.tc_borders
-        tc_shd = tc_props_applied.tc_shd
+        shd_val = tc_props_applied.tc_shd.val
 
-        # apply shading to paragraphs in cell
-        for par in _Cell(tc, self._ct_tbl).paragraphs:
-            shade_element(
-                par._p.get_or_add_pPr(), color_hex=hex_color, val=tc_shd.val
-            )
-            for run in par.runs:
-                # adjust run level font color
-                run.font.color.rgb = RGBColor(*rgb_color)
+        # apply shading to paragraphs in cell; paragraphs and runs are read
+        # from the cell element directly instead of building wrappers for them
+        for p in tc.iterchildren(_P_TAG):
+            shade_element(p.get_or_add_pPr(), color_hex=hex_color, val=shd_val)
+            for r in p.iterchildren(_R_TAG):
+                # adjust run level font color; the run's parent is only used to
+                # access the document part, which is not needed here
+                Run(r, None).font.color.rgb = rgb_color
 
                 # adjust run level shading if existing
                 shade_element(
-                    run._r.get_or_add_rPr(), color_hex=hex_color,
-                    val=tc_shd.val
+                    r.get_or_add_rPr(), color_hex=hex_color, val=shd_val
                 )
 
         # add cell shading
-        shade_element(
-            tc.get_or_add_tcPr(), color_hex=hex_color, val=tc_shd.val
-        )
+        shade_element(tc.get_or_add_tcPr(), color_hex=hex_color, val=shd_val)
 
         # Adjust cell border colors. This gets or adds a new tcBorders element
         # to the tcPr element of the cell. If the tcBorders element already
@@ -223,48 +270,52 @@ class TableColorizationHandler:
         # other attributes are kept taking into account the table style
         # hierarchy.
         tc_props = tc.get_or_add_tcPr()
-        if (tc_borders_elem := tc_props.find(qn('w:tcBorders'))) is None:
+        if (tc_borders_elem := tc_props.find(_TC_BORDERS_TAG)) is None:
             tc_borders_elem = OxmlElement('w:tcBorders')
             tc_props.append(tc_borders_elem)
 
         # iterate over all borders of the cell (top, left, bottom, right,
         # insideH, insideV, tl2br, tr2bl)
-        for b in tc_borders.__slots__:
-            if (elem_tag := tc_borders_elem.find(qn(f'w:{b}'))) is None:
+        for b, b_tag in _TC_BORDER_TAGS:
+            if (elem_tag := tc_borders_elem.find(b_tag)) is None:
                 elem_tag = OxmlElement(f'w:{b}')
                 tc_borders_elem.append(elem_tag)
 
             # iterate over all attributes of the current border (val, sz,
             # space, color) and overwrite the color
-            for attr in getattr(tc_borders, b).__slots__:
-                if (
-                        attr_val := getattr(getattr(tc_borders, b), attr)
-                ) is None:
+            border = getattr(tc_borders, b)
+            for attr, attr_tag in _BORDER_ATTR_TAGS:
+                if (attr_val := getattr(border, attr)) is None:
                     continue
 
                 attr_val = hex_color if attr == 'color' else attr_val
-                elem_tag.set(qn(f'w:{attr}'), attr_val)
+                elem_tag.set(attr_tag, attr_val)
 
     def __get_tc_props_applied(
-            self, tc: CT_Tc, tr: CT_Row, cell_loc: str
+            self, tc: CT_Tc, tr_cnf: Union[etree._Element, None],
+            cell_loc: str
     ) -> styles.TableCellProperty:
         r"""Get the actual table cell properties applied to a cell taking into
         account the table style hierarchy.
 
         @param tc: The cell to be colored
-        @param tr: The row of the cell to be colored
+        @param tr_cnf: The cnfStyle element of the cell's row, or None
 
         @return: The table cell properties applied to the cell, consisting of
             shading and border styles
         """
+        # cell level properties; the cell is read in place, as it has not yet
+        # been modified by the colorization at this point
+        tc_pr = _first(_XP_TC_PR(tc))
+
         # create border style based on hierarchy
-        tc_borders = self.__get_applied_tc_borders(tc, cell_loc=cell_loc)
+        tc_borders = self.__get_applied_tc_borders(tc_pr, cell_loc=cell_loc)
 
         # create shading style based on hierarchy
-        tc_shd = self.__get_applied_tc_shd(tc)
+        tc_shd = self.__get_applied_tc_shd(tc_pr)
 
         # parse conditional formatting
-        cond_style_applied = self.__get_tc_cond_style_applied(tc, tr)
+        cond_style_applied = self.__get_tc_cond_style_applied(tc_pr, tr_cnf)
 
         # consolidate conditional and non-conditional styles
         tc_borders = fill_border_style(
@@ -279,13 +330,15 @@ class TableColorizationHandler:
         )
 
     def __get_tc_cond_style_applied(
-            self, tc: CT_Tc, tr: CT_Row
+            self,
+            tc_pr: Union[etree._Element, None],
+            tr_cnf: Union[etree._Element, None]
     ) -> styles.TableCellProperty:
         r"""Get the conditional table cell properties applied to a cell taking
         into account the table style hierarchy.
 
-        @param tc: The cell to be colored
-        @param tr: The row of the cell to be colored
+        @param tc_pr: The tcPr element of the cell to be colored, or None
+        @param tr_cnf: The cnfStyle element of the cell's row, or None
 
         @return: The conditional table cell properties applied to the cell,
             consisting of shading and border styles
@@ -297,20 +350,17 @@ class TableColorizationHandler:
             return styles.TableCellProperty.init_zero()
 
         # cell level cnf style
-        tc_etree = etree.fromstring(tc.xml)
-        if (tc_pr := tc_etree.find(qn('w:tcPr'))) is not None:
-            if (tc_cnf := tc_pr.find(qn('w:cnfStyle'))) is not None:
-                for _attr in cnf_style.__slots__:
-                    setattr(cnf_style, _attr, tc_cnf.get(qn(f'w:{_attr}')))
+        if tc_pr is not None:
+            if (tc_cnf := _first(_XP_CNF_STYLE(tc_pr))) is not None:
+                for _attr, _attr_tag in _CNF_ATTR_TAGS:
+                    setattr(cnf_style, _attr, tc_cnf.get(_attr_tag))
 
         # row level cnf style
-        tr_etree = etree.fromstring(tr.xml)
-        if (tr_pr := tr_etree.find(qn('w:trPr'))) is not None:
-            if (tr_cnf := tr_pr.find(qn('w:cnfStyle'))) is not None:
-                for _attr in cnf_style.__slots__:
-                    if getattr(cnf_style, _attr) is not None:
-                        continue
-                    setattr(cnf_style, _attr, tr_cnf.get(qn(f'w:{_attr}')))
+        if tr_cnf is not None:
+            for _attr, _attr_tag in _CNF_ATTR_TAGS:
+                if getattr(cnf_style, _attr) is not None:
+                    continue
+                setattr(cnf_style, _attr, tr_cnf.get(_attr_tag))
 
         # determine conditional style
         applied_styles = []
@@ -427,24 +477,23 @@ class TableColorizationHandler:
         )
 
     def __get_applied_tc_borders(
-            self, tc: CT_Tc, cell_loc: str
+            self, tc_pr: Union[etree._Element, None], cell_loc: str
     ) -> styles.TableCellBorders:
         r""" Finds the applied table cell borders for a given table cell by
         traversing through the hierarchy of styles defined for the
         table and its cells.
 
-        @param tc: table cell element
+        @param tc_pr: tcPr element of the table cell, or None
 
         @return: table cell borders
         """
         # init table cell borders with None values
         tbl_cell_borders = styles.TableCellBorders.init_zero()
-        tc_etree = etree.fromstring(tc.xml)
 
         # 1) parse cell level borders (source: word/document.xml)
-        if (tc_pr := tc_etree.find(qn('w:tcPr'))) is not None:
+        if tc_pr is not None:
             tc_pr_tc_borders = parse_tc_borders_element(
-                tc_borders_elem=tc_pr.find(qn('w:tcBorders'))
+                tc_borders_elem=_first(_XP_TC_BORDERS(tc_pr))
             )
 
             tbl_cell_borders = fill_border_style(
@@ -481,24 +530,25 @@ class TableColorizationHandler:
 
         return tbl_cell_borders
 
-    def __get_applied_tc_shd(self, tc: CT_Tc) -> styles.ShdAttributes:
+    def __get_applied_tc_shd(
+            self, tc_pr: Union[etree._Element, None]
+    ) -> styles.ShdAttributes:
         r""" Finds the applied table cell shading for a given table cell by
         traversing through the hierarchy of styles defined for the
         table and its cells.
 
-        @param tc: table cell element
+        @param tc_pr: tcPr element of the table cell, or None
 
         @return: table cell shading
         """
 
         # init table cell borders with None values
         tc_shd = styles.ShdAttributes.init_zero()
-        tc_etree = etree.fromstring(tc.xml)
 
         # 1) parse cell level shading (source: word/document.xml)
-        if (tc_pr := tc_etree.find(qn('w:tcPr'))) is not None:
+        if tc_pr is not None:
             tc_pr_tc_shd = parse_shd_element(
-                shd_elem=tc_pr.find(qn('w:shd'))
+                shd_elem=_first(_XP_SHD(tc_pr))
             )
             tc_shd = fill_shd_style(tc_shd, tc_pr_tc_shd)
 
@@ -568,7 +618,21 @@ class TableColorizationHandler:
             by conditional formatting, or by cell level properties defined in
             word/document.xml.
 
+        Note: Tables referencing the same style (including nested tables which
+            inherit the style of their parent table) share the parsed style
+            properties, which are cached by style id in the colorization
+            handler of the document.
+
         """
+        style_id = getattr(self._ct_tbl_ref_style, 'styleId', None)
+        parsed_tbl_styles = self._colorization_handler.parsed_tbl_styles
+
+        if style_id is not None and style_id in parsed_tbl_styles:
+            (
+                self._ref_cnd_styles, self._ref_tbl_props, self._ref_tc_props
+            ) = parsed_tbl_styles[style_id]
+            return
+
         try:
             style_etree = etree.fromstring(self._ct_tbl_ref_style.xml)
         except AttributeError:
@@ -592,3 +656,8 @@ class TableColorizationHandler:
             self._ref_tc_props = parse_tc_pr_element(
                 tc_pr=style_etree.find(qn('w:tcPr'))
             )
+
+        if style_id is not None:
+            parsed_tbl_styles[style_id] = (
+                self._ref_cnd_styles, self._ref_tbl_props, self._ref_tc_props
+            )
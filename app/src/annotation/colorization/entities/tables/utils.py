@@ -16,14 +16,19 @@ __all__ = [
     'convert_table_borders_to_cell_borders'
 ]
 
+# qualified attribute names of shading elements
+_W_FILL = qn("w:fill")
+_W_COLOR = qn("w:color")
+_W_VAL = qn("w:val")
+
 
 def shade_element(prop, color_hex, val=None):
     r""" Apply shading to an element """
     color_hex = color_hex.replace('#', '').upper()
     shd = OxmlElement("w:shd")
-    shd.set(qn("w:fill"), color_hex)
-    shd.set(qn("w:color"), color_hex)
-    shd.set(qn("w:val"), val or "clear")
+    shd.set(_W_FILL, color_hex)
+    shd.set(_W_COLOR, color_hex)
+    shd.set(_W_VAL, val or "clear")
     prop.append(shd)
 
 
@@ -48,11 +53,23 @@ def fill_border_style(
         borders_attrs = getattr(borders, _border)
 
         # iterate over all border attributes (val, sz, space, color)
-        # of the current border and overwrite if it is None
-        for _attr in borders_attrs.__slots__:
-            if getattr(borders_attrs, _attr) is not None:
-                continue
-            setattr(borders_attrs, _attr, getattr(new_borders_attrs, _attr))
+        # of the current border and overwrite if it is None; the attributes
+        # may be shared (e.g. zero initialized borders), so a new object is
+        # created instead of modifying them in place
+        if not any(
+                getattr(borders_attrs, _attr) is None
+                and getattr(new_borders_attrs, _attr) is not None
+                for _attr in borders_attrs.__slots__
+        ):
+            continue
+
+        setattr(borders, _border, styles.BorderAttributes(**{
+            _attr: _fill_value(
+                getattr(borders_attrs, _attr),
+                getattr(new_borders_attrs, _attr)
+            )
+            for _attr in borders_attrs.__slots__
+        }))
 
     return borders
 
@@ -68,11 +85,22 @@ def fill_shd_style(
 
     @return: The shading style of the cell after applying the new shading style
     """
-    for s in new_shd.__slots__:
-        if getattr(shd, s) is not None:
-            continue
-        setattr(shd, s, getattr(new_shd, s))
-    return shd
+    # the shading may be shared (e.g. zero initialized shading), so a new
+    # object is created instead of modifying it in place
+    if not any(
+            getattr(shd, s) is None and getattr(new_shd, s) is not None
+            for s in shd.__slots__
+    ):
+        return shd
+
+    return styles.ShdAttributes(**{
+        s: _fill_value(getattr(shd, s), getattr(new_shd, s))
+        for s in shd.__slots__
+    })
+
+
+def _fill_value(value, new_value):
+    return new_value if value is None else value
 
 
 def check_if_header_row(row: CT_Row) -> bool:
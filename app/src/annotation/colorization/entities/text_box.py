@@ -1,11 +1,18 @@
 from docx.document import Document as _Document
+from docx.oxml.ns import nsmap
 from docx.text.paragraph import Paragraph
+from lxml import etree
 from typing import Tuple
 
 from src.annotation.colorization import ColorizationHandler
 
 import settings
 
+# compiled once instead of on each call
+_TEXT_BOX_PARAGRAPHS = etree.XPath(
+    './/w:txbxContent//w:p', namespaces={'w': nsmap['w']}
+)
+
 
 def colorize_text_boxes(
         document: _Document,
@@ -22,10 +29,12 @@ def colorize_text_boxes(
     @param hsv_color: the color to use for text boxes in hsv color space
     @param colorization_handler: global tracker for colorization information
     """
-    text_box_elements = document.element.body.xpath(".//w:txbxContent//w:p")
-    for par_xml in text_box_elements:
-        colorization_handler.assign_par_color(
+    decision_source = settings.annotation.ANNOTATION_XML_PATTERN
+    assign_par_color = colorization_handler.assign_par_color
+
+    for par_xml in _TEXT_BOX_PARAGRAPHS(document.element.body):
+        assign_par_color(
             par=Paragraph(par_xml, document),
             base_color=hsv_color,
-            decision_source=settings.annotation.ANNOTATION_XML_PATTERN
+            decision_source=decision_source
         )
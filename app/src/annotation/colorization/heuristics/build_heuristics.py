@@ -316,7 +316,7 @@ class ParagraphHeuristic:
                 # this will only be max count if there are no other characters
                 init_or_add_to_count_map(
                     mapping=characters_per_recommendation,
-                    key=str(color_settings.COLOR_WHITESPACE),
+                    key=color_settings.COLOR_WHITESPACE,
                     count=-1,
                 )
                 continue
@@ -358,17 +358,16 @@ class ParagraphHeuristic:
                             [color_settings.COLOR_TEXT] * len(run_heuristics)
                         # hacky
                         characters_per_recommendation = {
-                            str(color_settings.COLOR_TEXT): 1000
+                            color_settings.COLOR_TEXT: 1000
                         }
                         prev_run_was_heading = False
                 else:
                     prev_run_was_heading = False
 
                 # counting how many characters each color needs to apply to
-                # not lists are not hashable --> convert to string
                 init_or_add_to_count_map(
                     mapping=characters_per_recommendation,
-                    key=str(run_heuristic),
+                    key=run_heuristic,
                     count=len(run.text)
                 )
             else:
@@ -377,18 +376,15 @@ class ParagraphHeuristic:
                 prev_run_was_heading = False
                 init_or_add_to_count_map(
                     mapping=characters_per_recommendation,
-                    key=str(color_settings.COLOR_TEXT),
+                    key=color_settings.COLOR_TEXT,
                     count=len(run.text)
                 )
 
         # if a different color has more characters, that should be the main
-        # color! undo the str conversion we performed (in order to enable
-        # hashing)
+        # color!
         if characters_per_recommendation:
-            main_color = eval(
-                max(characters_per_recommendation,
-                    key=characters_per_recommendation.get)
-            )
+            main_color = max(characters_per_recommendation,
+                             key=characters_per_recommendation.get)
             # replace all whitespaces with whatever main color turned out to be
             for index in whitespace_run_indices:
                 run_heuristics[index] = main_color
@@ -2,12 +2,31 @@ from docx.text.paragraph import Paragraph
 from docx.text.run import Run
 from typing import Union, List, Tuple
 import copy
+import functools
 import re
 
 from src.annotation.config import AnnotationConfig
 import settings
 import settings.content_awareness as settings_ca
 
+# a run starts a list item if its first word is a number or a single letter,
+# followed by a numbering follower
+LIST_NUMBERING_PATTERN = re.compile(
+    r'^(?:[0-9]+|\w)(?:' + '|'.join(settings_ca.NUMBERING_FOLLOWERS) + ')'
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _form_field_pattern(form_field_min_length: int) -> re.Pattern:
+    r"""
+    Pattern matching a sequence of at least form_field_min_length form field
+    symbols.
+    """
+    return re.compile(
+        '[' + re.escape(''.join(settings_ca.FORM_FIELD_SYMBOLS)) + ']'
+        + '{' + str(max(1, form_field_min_length)) + ',}'
+    )
+
 
 def form_check(
         element: Paragraph, form_field_min_length: int, *args, **kwargs
@@ -37,17 +56,8 @@ def form_check(
 
     # go through entire text --> if there is some valid field indicator,
     # we need to go into form handling
-    current_field_text = ""
-    for char in element.text:
-        if char in settings_ca.FORM_FIELD_SYMBOLS:
-            current_field_text += char
-            if len(current_field_text) >= form_field_min_length:
-                return True
-        # broken sequence
-        else:
-            current_field_text = ""
-
-    return False
+    pattern = _form_field_pattern(form_field_min_length)
+    return pattern.search(element.text) is not None
 
 
 def quote_check(element: Paragraph, *args, **kwargs) -> bool:
@@ -75,21 +85,14 @@ def list_check_run(run: Run) -> bool:
 
     returns: bool decision
     """
-    number_regexes = []
-    for follower_char in settings_ca.NUMBERING_FOLLOWERS:
-        number_regexes.append(re.compile('^[0-9]+' + follower_char))
-        # also check a single letter, followed by a follower
-        number_regexes.append(re.compile('^\w' + follower_char))
-
     if (len(run.text) > 0) and not (run.text.isspace()):
-        first_word = run.text.split()[0]
         # list character first, or number followed by
-        if run.text[0] in settings_ca.NUMBERING_SYMBOLS:
+        if run.text[0] in settings_ca.NUMBERING_SYMBOL_SET:
             return True
 
-        for reg_exp in number_regexes:
-            if reg_exp.search(first_word):
-                return True
+        first_word = run.text.split(maxsplit=1)[0]
+        if LIST_NUMBERING_PATTERN.match(first_word):
+            return True
 
 
 def list_check(element: Paragraph, *args, **kwargs) -> bool:
@@ -176,7 +179,7 @@ def form_handler(
         # track beginning form_field characters differently, due to "seams"
         form_field_beginning_text = ""
         for char in run.text:
-            if char in settings_ca.FORM_FIELD_SYMBOLS:
+            if char in settings_ca.FORM_FIELD_SYMBOL_SET:
                 form_field_beginning_text += char
                 run_chara_index += 1
             else:
@@ -205,7 +208,7 @@ def form_handler(
             ):
                 char = prev_run.text[prev_run_char_from_end]
 
-                if char in settings.content_awareness.FORM_FIELD_SYMBOLS:
+                if char in settings_ca.FORM_FIELD_SYMBOL_SET:
                     prev_run_field_chars = char + prev_run_field_chars
                 else:
                     break
@@ -269,7 +272,7 @@ def form_handler(
             char = run.text[pos]
 
             # track chars individually, creating runs as we go
-            if char in settings.content_awareness.FORM_FIELD_SYMBOLS:
+            if char in settings_ca.FORM_FIELD_SYMBOL_SET:
                 current_field_text += char
             # we've run out of chars for a field
             else:
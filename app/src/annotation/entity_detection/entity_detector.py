@@ -5,6 +5,7 @@ from typing import List, Tuple, Dict
 
 from src.annotation.annotation_objects import BoundingBox, Entity
 from src.annotation.utils.bbox_utils import detect_contours
+from src.annotation.utils.color_utils import pack_hsv
 from src.annotation.colorization import ColorizationHandler
 import settings
 
@@ -48,6 +49,20 @@ class EntityDetector:
 
         self.used_colors = colorization_handler.used_colors
 
+        # table of the colors present on this page, indexed by packed hsv key;
+        # used colors mostly appear on a few pages of a document only, so
+        # this allows to skip the contour detection for all other colors.
+        # Pixels below the minimum saturation or value never match an entity
+        # color.
+        colored = self.image[
+            (self.image[..., 1] >= settings.colors.SAT_MIN)
+            & (self.image[..., 2] >= settings.colors.VAL_MIN)
+        ]
+        self.page_colors = np.zeros(
+            (settings.colors.HUE_MAX + 1) << 16, dtype=bool
+        )
+        self.page_colors[pack_hsv(colored)] = True
+
         # mapping to identify detection handler: key = hue value of color. The
         # detection is implemented seperately for tables and table headers
         # (both detect both the main entity, and the individual cells). All
@@ -59,6 +74,21 @@ class EntityDetector:
             hue_table_header: self._detect_table_headers,
         }
 
+    def _color_on_page(self, hsv_color: Tuple[int, int, int]) -> bool:
+        r""" Checks whether any pixel on the page matches the color, within the
+        same tolerance used for the contour detection.
+
+        @param hsv_color: the color to check
+        @return: True if the color appears on the page
+        """
+        lowerb = _lower_bound_with_tol(*hsv_color)
+        upperb = _upper_bound_with_tol(*hsv_color)
+        hsv_range = np.stack(np.meshgrid(
+            *(np.arange(lo, hi + 1) for lo, hi in zip(lowerb, upperb)),
+            indexing='ij'
+        ), axis=-1)
+        return bool(self.page_colors[pack_hsv(hsv_range)].any())
+
     def detect_entities(self) -> Dict[int, List[Entity]]:
         r""" Detects all entities in the source image by matching colors in the
         colorized image.
@@ -98,7 +128,10 @@ class EntityDetector:
         entity_category_id = settings.colors.get_entity_category_id(hsv_color)
 
         entities = []
-        for hsv_color in self.used_colors[str(hsv_color)]:
+        for hsv_color in self.used_colors[hsv_color]:
+            if not self._color_on_page(hsv_color):
+                continue
+
             # detect contours
             lowerb = _lower_bound_with_tol(*hsv_color)
             upperb = _upper_bound_with_tol(*hsv_color)
@@ -168,8 +201,11 @@ class EntityDetector:
 
         # detect contours for table cells
         entity_category_id = settings.entities.ENTITY_TABLE_CELL_ID
-        tbl_cell_colors = self.used_colors[str(settings.colors.COLOR_TABLE)]
+        tbl_cell_colors = self.used_colors[settings.colors.COLOR_TABLE]
         for hsv_color in tbl_cell_colors:
+            if not self._color_on_page(hsv_color):
+                continue
+
             lowerb = _lower_bound_with_tol(*hsv_color)
             upperb = _upper_bound_with_tol(*hsv_color)
             contours, _ = detect_contours(self.image, lowerb, upperb)
@@ -230,8 +266,11 @@ class EntityDetector:
 
         # detect contours for table header cells
         entity_category_id = settings.entities.ENTITY_TABLE_HEADER_CELL_ID
-        hdr_colors = self.used_colors[str(settings.colors.COLOR_TABLE_HEADER)]
+        hdr_colors = self.used_colors[settings.colors.COLOR_TABLE_HEADER]
         for hsv_color in hdr_colors:
+            if not self._color_on_page(hsv_color):
+                continue
+
             lowerb = _lower_bound_with_tol(*hsv_color)
             upperb = _upper_bound_with_tol(*hsv_color)
             contours, _ = detect_contours(self.image, lowerb, upperb)
@@ -1 +1 @@
-from .color_utils import hsv_to_rgb, hsv_to_bgr
+from .color_utils import hsv_to_rgb
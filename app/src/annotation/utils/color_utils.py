@@ -1,9 +1,11 @@
+import functools
+
 import cv2
 import numpy as np
 from docx.document import Document as DocxDocument
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
-from docx.text.paragraph import Paragraph
+from docx.shared import RGBColor
 
 from typing import Tuple
 
@@ -56,33 +58,35 @@ def hsv_to_rgb(hsv_color: Tuple[int, int, int]) -> Tuple[int, int, int]:
     )
 
 
-def hsv_to_bgr(hsv_color: Tuple[int, int, int]) -> Tuple[int, int, int]:
-    r"""convert hsv colors to bgr
+@functools.lru_cache(maxsize=1024)
+def hsv_to_rgb_hex(
+        hsv_color: Tuple[int, int, int]
+) -> Tuple[RGBColor, str]:
+    r""" convert an hsv color to its rgb and hex representation; the number of
+    distinct colors is small, so the conversion is cached
 
     @param hsv_color: a tuple of 3 values (h, s, v)
 
-    @return: a tuple of 3 values (r, g, b)
+    @return: a tuple (rgb, hex) with rgb the RGBColor to assign to fonts
     """
-    hsv_color_uint8 = np.uint8(hsv_color)
+    rgb_color = hsv_to_rgb(hsv_color=hsv_color)
+    return RGBColor(*rgb_color), rgb_to_hex(rgb_color=rgb_color)
 
-    # TODO: remove this ambiguity: in the future only a tuple of 3 values is
-    #  accepted
-    if len(hsv_color_uint8.shape) == 1:
-        hsv_color_uint8 = np.expand_dims(hsv_color_uint8, axis=[0, 1])
-    elif len(hsv_color_uint8.shape) == 2:
-        hsv_color_uint8 = np.expand_dims(hsv_color_uint8, axis=0)
-    else:
-        raise ValueError(
-            "! Warning: hsv color has shape {}; this function "
-            "excpects hsv_color to be a tuple of 3 values".format(
-                hsv_color_uint8.shape)
-        )
 
-    return tuple(
-        cv2.cvtColor(hsv_color_uint8, cv2.COLOR_HSV2BGR)
-        .squeeze()
-        .astype(int)
-        .tolist()
+def pack_hsv(hsv_colors) -> np.ndarray:
+    r"""pack hsv colors into integer keys (h << 16) | (s << 8) | v; all keys
+    are smaller than (settings.colors.HUE_MAX + 1) << 16
+
+    @param hsv_colors: hsv color(s) with the channels in the last axis, e.g. a
+        tuple of 3 values (h, s, v) or an hsv image
+
+    @return: an array of packed keys, with the channel axis removed
+    """
+    hsv_colors = np.asarray(hsv_colors, dtype=np.int32)
+    return (
+            (hsv_colors[..., 0] << 16)
+            | (hsv_colors[..., 1] << 8)
+            | hsv_colors[..., 2]
     )
 
 
@@ -107,22 +111,3 @@ def shade_element(prop, color_hex):
     shd = OxmlElement("w:shd")
     shd.set(qn("w:fill"), color_hex)
     prop.append(shd)
-
-
-def check_if_par_is_numbered(par: Paragraph) -> bool:
-    r"""
-    Check if a par is numbered, which we assume to indicate a list.
-
-    @param par: the paragraph to check
-
-    @return: True if the paragraph is numbered, False otherwise
-    """
-
-    # a list style (even within a normal paragraph!) means numbering has
-    # occured.
-    par_xml_numbering = par._p.xpath(".//w:pPr//w:numPr")
-
-    if len(par_xml_numbering) > 0:
-        return True
-
-    return False
@@ -1,16 +1,12 @@
 from io import BytesIO
-import pandas as pd
 import os
 import tarfile
 import logging
 import uuid
 import time
 from pathlib import Path
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-from joblib import Parallel, delayed
-import threading
+import asyncio
+import httpx
 import settings
 from src.data_sources.maldoc_check import MalDocCheck
 from src.data_sources.http_handlers import run_sess, header_handler, \
@@ -18,38 +14,43 @@ from src.data_sources.http_handlers import run_sess, header_handler, \
 from src.data_sources.download_exceptions import FileSizeExceeded
 import hashlib
 from orm.models import SourcesRecordDB
-import multiprocessing as mp
-from typing import List, Tuple, Union
+import pyarrow as pa
+import pyarrow.parquet as pq
+from multiprocessing.util import Finalize
+from typing import List, Optional, Tuple, Union
 
 
-class DownloadProcess(mp.Process):
-    def __init__(self, input_queue: mp.Queue, cc_dump_id: str, dl_timeout: int,
-                 dl_retries: int, dl_redirects: int, dl_backoff: int,
-                 num_threads: int, write_dir: str):
-        """
-        Launch one process which receives URL batches in a queue, then
-        downloads them while writing downloaded files to tars and metadata to
-        parquet files.
+# columns of the shard metadata parquet files; for now, all entries as string
+RECORD_COLUMNS = tuple(c.key for c in SourcesRecordDB.__table__.columns)
+RECORD_SCHEMA = pa.schema([(c, pa.string()) for c in RECORD_COLUMNS])
+
 
-        Each process is responsible for one shard_id (counting up from
+class DownloadWorker:
+    def __init__(self, cc_dump_id: str, dl_timeout: int, dl_retries: int,
+                 dl_redirects: int, dl_backoff: int, max_concurrency: int,
+                 write_dir: str):
+        """
+        State of one download worker process, which downloads URL batches
+        while writing downloaded files to tars and metadata to parquet files.
+        The urls of a batch are downloaded concurrently on a single threaded
+        asyncio event loop, which is kept for the lifetime of the worker.
+        One instance is created per process of the download pool, by
+        init_download_worker, and kept for the whole lifetime of the process.
+
+        Each worker is responsible for one shard_id (counting up from
         1...(num_urls / shard_size)) of a given opendoc cc_dump_id.
 
-        @param input_queue: A multiprocessing queue which receives the URLs to
-            handle
         @param cc_dump_id: Dump id this process is part of processing.
         @param dl_timeout: Timeout for requests.
         @param dl_retries: How many times the process will retry a failed
             download / request.
         @param dl_redirects: Amount of allowed redirects in request.
         @param dl_backoff: Backoff factor when retrying requests.
-        @param num_threads: Number of threads to use (default 10)
+        @param max_concurrency: Max. number of concurrent downloads
         @param write_dir: Directory to write all output to
         """
-        super(DownloadProcess, self).__init__()
-
         # unique process id
         self.worker_id = str(uuid.uuid4())
-        self.input_queue = input_queue
         self.cc_dump_id = cc_dump_id
         self.dl_timeout = dl_timeout
         self.dl_retries = dl_retries
@@ -70,30 +71,24 @@ class DownloadProcess(mp.Process):
 
         # create initial writable files
         self.get_writable_files()
-        self.num_threads = num_threads
-        # lock for in-actor threading
-        self.lock = threading.Lock()
+        self.max_concurrency = max_concurrency
 
-        # lock for pandas concat
-        self.pdLock = threading.Lock()
+        # event loop and http client, shared by all batches handled by this
+        # worker; everything runs on this thread, so the tar and dataframe
+        # writes need no locking
+        self.loop = asyncio.new_event_loop()
+        self.sess = self.get_session()
 
-    def run(self):
+    def close(self):
         """
-        Required by multiprocessing. This is the processes core loop.
+        Flush the last shard and release the http session. Called once the
+        worker process exits.
         """
-        while True:
-            inputs = self.input_queue.get(block=True, timeout=None)
-            if inputs is None:
-                self.flush()
-                self.logger_writable.info(
-                    "Regularly terminated worker; queue is empty.")
-                break
-
-            try:
-                self.batch_handler(inputs)
-            except Exception as e:
-                self.logger_writable.error("Batch handler error! " + str(
-                    e) + " Missed Batch items " + str(inputs))
+        self.flush()
+        self.loop.run_until_complete(self.sess.aclose())
+        self.loop.close()
+        self.logger_writable.info(
+            "Regularly terminated worker.")
 
     # create a new tar file and parquet file once we reach a new shard
     def get_writable_files(self):
@@ -109,14 +104,11 @@ class DownloadProcess(mp.Process):
         self.tar_writable = tarfile.TarFile.open(
             os.path.join(self.WORK_DIR, self.TAR_FILE), mode='w:gz')
 
-        # again, hacky but easy
-        cols = [c.key for c in SourcesRecordDB.__table__.columns]
-        self.df = pd.DataFrame(columns=cols)
-        # For now, all entries as string
-        self.df = self.df.astype(str)
+        # metadata rows of the current shard
+        self.records = []
 
         self.PARQUET_FILE = f"{self.shard_id}.parquet"
-        # just a filename, since pandas will dump to this
+        # just a filename, since the records are dumped to this on flush
         self.parquet_writable = os.path.join(self.WORK_DIR, self.PARQUET_FILE)
 
         self.logger_writable.info(
@@ -131,9 +123,12 @@ class DownloadProcess(mp.Process):
         if hasattr(self, 'tar_writable'):
             self.tar_writable.close()
 
-        # dump current db dataframe to parquet
-        if hasattr(self, 'df'):
-            self.df.to_parquet(self.parquet_writable)
+        # dump current records to parquet
+        if hasattr(self, 'records'):
+            pq.write_table(
+                pa.Table.from_pylist(self.records, schema=RECORD_SCHEMA),
+                self.parquet_writable
+            )
 
     def get_logger(
             self, file_path: str, level=logging.INFO
@@ -178,63 +173,61 @@ class DownloadProcess(mp.Process):
         if self.current_shard_size > 10 ** 8:
             self.get_writable_files()
 
+    def get_session(self) -> httpx.AsyncClient:
+        """
+        Create an http client with a connection pool sized to the max.
+        number of concurrent downloads.
+        """
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency
+        )
+        return httpx.AsyncClient(
+            limits=limits, max_redirects=self.dl_redirects
+        )
+
     def batch_handler(self, batch: List[Tuple[str, str]]):
         """
-        Download one batch of URLs with an HTTP adapter shared accross threads.
+        Download one batch of URLs with the worker's http client.
 
         @param batch: a batch of URLs and their hashes as tuples.
         """
+        self.loop.run_until_complete(self._download_batch(batch))
+        return 1
 
-        # create session
-        retries = Retry(
-            total=self.dl_retries,
-            redirect=self.dl_redirects,
-            backoff_factor=self.dl_backoff,
-            respect_retry_after_header=False,
-        )
-        # ! don't set too many threads per worker
-        adapter = HTTPAdapter(
-            max_retries=retries,
-            pool_connections=self.num_threads,
-            pool_maxsize=int(self.num_threads * 1.1)
-        )
-
-        with requests.Session() as sess:
-            sess.mount('http://', adapter)
-            sess.mount('https://', adapter)
+    async def _download_batch(self, batch: List[Tuple[str, str]]):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
 
-            _ = Parallel(n_jobs=self.num_threads, backend='threading')(
-                delayed(self.download_doc)(batch_item[0], batch_item[1], sess)
-                for batch_item in batch
-            )
+        async def _download(url: str, url_hash: str):
+            async with semaphore:
+                return await self.download_doc(url, url_hash, self.sess)
 
-        return 1
+        await asyncio.gather(*(
+            _download(url, url_hash) for url, url_hash in batch
+        ))
 
-    def record_to_df(self, record: SourcesRecordDB):
+    def add_record(self, record: SourcesRecordDB):
         """
-        Writes a document download record to the current dataframe, which will
-        later be dumped to a parquet file.
+        Adds a document download record to the records of the current shard,
+        which will later be dumped to a parquet file.
 
         @param record: Record to write, matching the ORM model.
         """
-        # ! hacky but easy
-        keep_recs = {c.key: (
-            [record.__dict__[c.key]] if c.key in record.__dict__ else [None])
-            for c in SourcesRecordDB.__table__.columns}
-        temp_df = pd.DataFrame(keep_recs).astype(str)
-        with self.pdLock:
-            self.df = pd.concat([self.df, temp_df])
-
-    def safe_close(self, response: Union[requests.Response, None]):
+        self.records.append({
+            c: str(record.__dict__.get(c)) for c in RECORD_COLUMNS
+        })
+
+    async def safe_close(self, response: Union[httpx.Response, None]):
         """
         Safely close a response.
 
-        @param response: a requests.Response object.
+        @param response: a httpx.Response object.
         """
         if response is not None:
-            response.close()
+            await response.aclose()
 
-    def download_doc(self, url: str, url_hash: str, sess: requests.Session):
+    async def download_doc(self, url: str, url_hash: str,
+                           sess: httpx.AsyncClient):
         """
         Download a docx from a given url, check it's safety,
         Write it into tarfile and append db info to parquet (if safe).
@@ -242,7 +235,7 @@ class DownloadProcess(mp.Process):
         @param url: The url of the docx file to download. The worker receives
             this parameter from the head.
         @param url_hash: Hash of the url
-        @param sess: Shared HTTP Session
+        @param sess: Shared HTTP client
         """
 
         # ! one source of truth: DB records
@@ -259,10 +252,10 @@ class DownloadProcess(mp.Process):
 
             # <----------------- request header ----------------->
             # http session head check
-            response, exception, timestamp = run_sess(
+            response, exception, timestamp = await run_sess(
                 sess_method=sess.head, timeout=self.dl_timeout,
                 allow_redirects=True,
-                url=url
+                url=url, retries=self.dl_retries, backoff_factor=self.dl_backoff
             )
 
             # handle header (creates or catches all fatal exceptions)
@@ -279,18 +272,18 @@ class DownloadProcess(mp.Process):
 
             # check exceptions
             if exception is not None:
-                self.safe_close(response)
+                await self.safe_close(response)
                 self.logger_writable.error(
                     "HTTP HEAD request exception: " + repr(exception))
-                self.record_to_df(record)
+                self.add_record(record)
                 return 0
 
             # <----------------- run get request ----------------->
             # get doc
-            response, exception, timestamp = run_sess(
+            response, exception, timestamp = await run_sess(
                 sess_method=sess.get, timeout=self.dl_timeout,
                 allow_redirects=True,
-                url=url
+                url=url, retries=self.dl_retries, backoff_factor=self.dl_backoff
             )
 
             # handle body
@@ -308,7 +301,7 @@ class DownloadProcess(mp.Process):
             # check exceptions
             if response is None:
                 self.logger_writable.error("HTTP GET no response")
-                self.record_to_df(record)
+                self.add_record(record)
                 return 0
 
             # maldoc checks
@@ -317,10 +310,10 @@ class DownloadProcess(mp.Process):
                 try:
                     indicators = maldoc.run()
                 except Exception as e:
-                    self.safe_close(response)
+                    await self.safe_close(response)
                     self.logger_writable.error(
                         "maldoc.run() failed with error: " + str(e))
-                    self.record_to_df(record)
+                    self.add_record(record)
                     return 0
 
                 olet_pass, reason = maldoc.validate_indicators(indicators)
@@ -338,21 +331,21 @@ class DownloadProcess(mp.Process):
                                 ind.value)
 
                 if not olet_pass:
-                    self.safe_close(response)
+                    await self.safe_close(response)
                     self.logger_writable.error(
                         "maldoc not passed, reason: " + str(reason))
-                    self.record_to_df(record)
+                    self.add_record(record)
                     return 0
 
             # ! extra filesize check (cannot rely on header information alone)
             content_len = len(response.content)
             if content_len > settings.download.MAX_FILESIZE:
-                self.safe_close(response)
+                await self.safe_close(response)
                 self.logger_writable.error(
                     "max filesize exceeded, " + str(content_len)
                 )
                 record.exception = repr(FileSizeExceeded(filesize=content_len))
-                self.record_to_df(record)
+                self.add_record(record)
                 return 0
 
             # write content to current tar file
@@ -366,16 +359,46 @@ class DownloadProcess(mp.Process):
                 # bytehash --> for post-processing deduplication
                 record.bytehash = hashlib.sha256(response.content).hexdigest()
 
-                self.record_to_df(record)
-                with self.lock:
-                    self.write_to_tar(doc_fn=doc_fn, content=response.content)
+                self.add_record(record)
+                self.write_to_tar(doc_fn=doc_fn, content=response.content)
                 self.logger_writable.info("Success!")
 
-            self.safe_close(response)
+            await self.safe_close(response)
             return 1
         except Exception as e:
             e_str = "Non-document error " + str(e)
             record.exception = e_str
             self.logger_writable.error(e_str)
-            self.record_to_df(record)
+            self.add_record(record)
             return 0
+
+
+# worker state of the current process, set up by init_download_worker
+_download_worker: Optional[DownloadWorker] = None
+
+
+def init_download_worker(*args):
+    """
+    Initializer of the download pool processes; creates the worker state once
+    per process. Arguments are passed on to DownloadWorker.
+    """
+    global _download_worker
+    _download_worker = DownloadWorker(*args)
+
+    # pool processes are not joined by user code, so the last shard is
+    # flushed by a finalizer which runs when the process exits
+    Finalize(_download_worker, _download_worker.close, exitpriority=10)
+
+
+def download_batch(batch: List[Tuple[str, str]]):
+    """
+    Download one batch of URLs in the current pool process.
+
+    @param batch: a batch of URLs and their hashes as tuples.
+    """
+    try:
+        _download_worker.batch_handler(batch)
+    except Exception as e:
+        _download_worker.logger_writable.error(
+            "Batch handler error! " + str(e) + " Missed Batch items " + str(
+                batch))
@@ -1,7 +1,8 @@
+import asyncio
 import time
 import settings
-from typing import Tuple, Union
-import requests
+from typing import Awaitable, Callable, Tuple, Union
+import httpx
 from src.data_sources.download_exceptions import (
     FileSizeExceeded,
     HTTPError,
@@ -11,48 +12,68 @@ from src.data_sources.download_exceptions import (
 )
 
 
-def run_sess(
-        sess_method: Union[requests.get, requests.head],
+async def run_sess(
+        sess_method: Callable[..., Awaitable[httpx.Response]],
         timeout: int,
-        allow_redirects: bool, url: str
-) -> Tuple[requests.Response, Exception, int]:
+        allow_redirects: bool, url: str,
+        retries: int = 0, backoff_factor: float = 0.0
+) -> Tuple[httpx.Response, Exception, int]:
     """run session
-    @param sess_method: requests.get or requests.head
+    @param sess_method: httpx.AsyncClient.get or httpx.AsyncClient.head
     @param timeout: int timeout
     @param allow_redirects: bool allow redirects
     @param url: str url
+    @param retries: number of retries on connection and transport errors;
+        invalid requests (unsupported protocol, local protocol errors) are not
+        retried
+    @param backoff_factor: retry number i sleeps backoff_factor * 2 ** (i - 1)
+        seconds before its attempt (no sleep before the first retry)
 
-    return: requests.Response, Exception str, Timestamp int
+    return: httpx.Response, Exception str, Timestamp int
     """
     timestamp = int(time.time())
     exception = None
-
-    try:
-        response = sess_method(
-            url, timeout=timeout, allow_redirects=allow_redirects, stream=True
-        )
-    except Exception as e:
-        response = None
-        exception = e
+    response = None
+
+    for attempt in range(retries + 1):
+        if attempt > 1:
+            await asyncio.sleep(backoff_factor * 2 ** (attempt - 1))
+
+        try:
+            response = await sess_method(
+                url, timeout=timeout, follow_redirects=allow_redirects
+            )
+            exception = None
+            break
+        except (httpx.UnsupportedProtocol, httpx.LocalProtocolError) as e:
+            # the request itself is invalid (e.g. unsupported url scheme), so
+            # retrying would fail the same way
+            exception = e
+            break
+        except httpx.TransportError as e:
+            exception = e
+        except Exception as e:
+            exception = e
+            break
 
     return response, exception, timestamp
 
 
 def header_handler(
-        response: requests.Response,
+        response: httpx.Response,
         exception: Exception
 ) -> Tuple[
-    Union[requests.Response, None],
+    Union[httpx.Response, None],
     dict,
     Union[Exception, FileSizeExceeded, InvalidContentType, HTTPError, None]
 ]:
     """ handle header: check for valid content type and content length, and
     return header metadata
 
-    @param response: requests.Response
-    @param exception: Exception raised during call to requests.head
+    @param response: httpx.Response
+    @param exception: Exception raised during call to sess.head
 
-    return: requests.Response, dict, Exception
+    return: httpx.Response, dict, Exception
     """
     header_metadata = {}
 
@@ -92,20 +113,20 @@ def header_handler(
 
 
 def body_handler(
-        response: requests.Response,
+        response: httpx.Response,
         exception: Exception
 ) -> Tuple[
-    Union[requests.Response, None],
+    Union[httpx.Response, None],
     dict,
     Union[Exception, HTTPError, FileSizeExceeded, None]
 ]:
     """ handle body: check if response is valid, fetch ip-address and content
     length, and return body metadata
 
-    @param response: requests.Response
+    @param response: httpx.Response
     @param exception: Exception raised during call to sess.get
 
-    return: requests.Response, dict, Exception
+    return: httpx.Response, dict, Exception
     """
     body_metadata = {}
 
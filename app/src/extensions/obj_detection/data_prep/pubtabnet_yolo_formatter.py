@@ -1,8 +1,9 @@
 import argparse
 import json
 from pathlib import Path
+import shutil
 
-import cv2
+from PIL import Image
 
 
 def main():
@@ -80,20 +81,13 @@ def handle_pubtabnet_json(path_tojson: Path, path_toimg: Path, outpath: Path, ma
         if not img_path.is_file():
             continue
 
-        # read and copy the file to output
-        img_f = cv2.imread(
-            str(
-                img_path
-            )
-        )
+        # copy the file to output; the image is not decoded
         # TODO shared augraphy handler
-        aug_img = img_f
-        cv2.imwrite(
-            str(outpath_img / img_name), aug_img
-        )
+        shutil.copyfile(img_path, outpath_img / img_name)
 
-        # get w and h of the image
-        hh, ww, _ = img_f.shape
+        # get w and h of the image; PIL only parses the header here
+        with Image.open(img_path) as img_f:
+            ww, hh = img_f.size
         iw_norm = ww
         ih_norm = hh
 
@@ -1,9 +1,13 @@
 import os
 import argparse
+import concurrent.futures
 from pathlib import Path
 import shutil
 import random
 
+MAX_MOVE_WORKERS = 16
+
+
 def main():
     r"""
     Utility script to move some train data (images and labels) into a different folder.
@@ -29,32 +33,45 @@ def main():
     )
     args = arg_parser.parse_args()
 
-    img_paths = sorted(
-        filter(lambda x: x.endswith(".png") or x.endswith(".jpg"), os.listdir(args.source_dir + "/images"))
-    )[0 : args.num]
+    with os.scandir(args.source_dir + "/images") as entries:
+        img_paths = sorted(
+            entry.name for entry in entries
+            if entry.name.endswith((".png", ".jpg"))
+        )[0 : args.num]
 
     print(img_paths)
 
-    # randomly sample
-    img_paths_shuffled = random.sample(img_paths, len(img_paths))
+    # randomly shuffle in place
+    random.shuffle(img_paths)
+    img_paths_shuffled = img_paths
 
-    label_paths = []
+    src_images_dir = Path(args.source_dir + "/images")
+    src_labels_dir = Path(args.source_dir + "/labels")
+    dest_images_dir = Path(args.dest_dir + "/images")
+    dest_labels_dir = Path(args.dest_dir + "/labels")
 
+    # collect image and label moves in a single pass
+    srcs, dests = [], []
     for img_name in img_paths_shuffled:
-        img_path = Path(args.source_dir + "/images") / img_name
-        dest_path = Path(args.dest_dir + "/images") / img_name
-        shutil.move(img_path, dest_path)
-        # print(img_path)
-        # print(dest_path)
-
-        label_path = img_path.parents[1] / "labels" / img_name.replace('.png', '.txt').replace('.jpg', '.txt')
-        label_paths.append(label_path)
-
-    for label_path in label_paths:
-        dest_path = Path(args.dest_dir + "/labels") / label_path.name
-        shutil.move(label_path, dest_path)
-        # print(label_path)
-        # print(dest_path)
+        label_name = img_name.replace('.png', '.txt').replace('.jpg', '.txt')
+        srcs.append(src_images_dir / img_name)
+        dests.append(dest_images_dir / img_name)
+        srcs.append(src_labels_dir / label_name)
+        dests.append(dest_labels_dir / label_name)
+
+    # on the same filesystem a move is a single rename syscall; otherwise
+    # the copies are io bound, so run them concurrently
+    same_fs = os.stat(src_images_dir).st_dev == os.stat(dest_images_dir).st_dev
+
+    if same_fs:
+        for src, dest in zip(srcs, dests):
+            os.rename(src, dest)
+    else:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=MAX_MOVE_WORKERS
+        ) as executor:
+            # consume the iterator so that errors are raised
+            list(executor.map(shutil.move, srcs, dests))
 
 
 if __name__ == "__main__":
@@ -1,6 +1,12 @@
 from ultralytics import YOLO
 import argparse
 import os
+import torch
+
+# allow TF32 tensor cores for matmuls and convolutions on Ampere and newer
+torch.backends.cuda.matmul.allow_tf32 = True
+torch.backends.cudnn.allow_tf32 = True
+torch.backends.cudnn.benchmark = True
 
 
 def main():
@@ -63,6 +69,21 @@ def main():
         default=False,
         help="If set, the model will be trained using learning rate decay"
     )
+    arg_parser.add_argument(
+        "--workers",
+        "-wk",
+        type=int,
+        default=min(16, os.cpu_count() or 1),
+        help="number of dataloader workers per GPU",
+    )
+    arg_parser.add_argument(
+        "--cache",
+        "-ca",
+        type=str,
+        default=None,
+        choices=["ram", "disk"],
+        help="Optionally cache decoded images in ram or on disk",
+    )
     args = arg_parser.parse_args()
 
     os.environ["CUDA_DEVICE_ORDER"] = "PCI_BUS_ID"
@@ -83,26 +104,26 @@ def main():
     if args.random_weights == True:
         # ! important: .yaml means this is just a config, not preloaded weights
         model = YOLO("yolov5l.yaml")
+    # with more than one device, ultralytics launches one process per GPU
+    # through torch.distributed.run and trains with DDP; batch is the total
+    # batch size, which is split evenly across the ranks.
+    devices = [int(x) for x in args.gpu_usage.split(",")]
+    train_kwargs = dict(
+        data=args.config_path,
+        epochs=args.epochs,
+        name=experiment_name,
+        device=devices,
+        batch=len(devices) * args.gpu_batch,
+        resume=res_decision,
+        amp=True,
+        # the ultralytics dataloader keeps its workers alive across epochs
+        workers=args.workers,
+        cache=args.cache if args.cache is not None else False,
+    )
     if args.learning_rate == True:
-        model.train(
-            data=args.config_path,
-            lr0 = 1e-3,
-            lrf = 1e-4,
-            epochs=args.epochs,
-            name=experiment_name,
-            device=[int(x) for x in args.gpu_usage.split(",")],
-            batch=len(args.gpu_usage.split(",")) * args.gpu_batch,
-            resume=res_decision,
-        )
-    else:
-        model.train(
-            data=args.config_path,
-            epochs=args.epochs,
-            name=experiment_name,
-            device=[int(x) for x in args.gpu_usage.split(",")],
-            batch=len(args.gpu_usage.split(",")) * args.gpu_batch,
-            resume=res_decision,
-        )
+        train_kwargs.update(lr0=1e-3, lrf=1e-4)
+
+    model.train(**train_kwargs)
 
 
 if __name__ == "__main__":
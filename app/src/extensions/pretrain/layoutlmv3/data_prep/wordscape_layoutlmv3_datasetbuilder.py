@@ -6,7 +6,6 @@ from datasets import GeneratorBasedBuilder, Value, Sequence, ClassLabel, Feature
 from datasets.download.download_manager import DownloadManager
 from datasets.info import DatasetInfo
 import multiprocessing as mp
-import numpy as np
 
 @dataclass
 class WSLayoutLMDataPoint():
@@ -16,7 +15,8 @@ class WSLayoutLMDataPoint():
     word_bboxes: List[List[int]]
     entity_bboxes: List[List[int]]
     entity_labels: List[int]
-    image: np.ndarray
+    # path to the page image; decoded lazily by the Image feature
+    image: str
 
 
 class WSLayoutLMDataBuilder(GeneratorBasedBuilder):
@@ -115,4 +115,6 @@ class WSLayoutLMDataCollectorProcess(mp.Process):
                     break
 
             else:
-                self._ingest_datapoint(input)
+                # formatters send lists of datapoints, one per processed tar
+                for datapoint in input:
+                    self._ingest_datapoint(datapoint)
@@ -13,7 +13,6 @@
 
 # TODO augraphy
 
-from io import BytesIO
 import json
 from pathlib import Path
 import shutil
@@ -34,7 +33,6 @@ from src.extensions.pretrain.layoutlmv3.data_prep.wordscape_layoutlmv3_datasetbu
     WSLayoutLMDataPoint,
 )
 import numpy as np
-from PIL import Image
 from datasets import Dataset, ClassLabel, Sequence
 
 
@@ -157,6 +155,9 @@ class WSLayoutLMFormatter(mp.Process):
         # out_path_labels.mkdir(parents=True, exist_ok=True)
         # tracking of accepted images
         accepted_img = 0
+        # datapoints are sent to the collector in one message per tar, to
+        # avoid paying the queue overhead for every single page
+        datapoint_batch = []
 
         ############################## build labels ##############################
         _, entity_id_to_class = self.build_labels(layoutlm_settings)
@@ -225,6 +226,8 @@ class WSLayoutLMFormatter(mp.Process):
                         ):
                             # enqueue that we have got the needed number of images
                             # out_q.put(accepted_img)
+                            if len(datapoint_batch) > 0:
+                                out_q.put(datapoint_batch)
                             return
 
                         # read the JSON metadata
@@ -341,15 +344,13 @@ class WSLayoutLMFormatter(mp.Process):
 
                         ############################## process page image ##############################
                         img_file_name = file_stem + ".jpg"
+                        img_file_writepath = out_path_images / img_file_name
+                        # copy the encoded jpg as is; decoding is deferred to
+                        # the huggingface Image feature, which loads from path
                         with tar_open.extractfile(img_file_name) as img_file_open:
-                            # img_np = np.asarray(bytearray(img_file_open.read()))
-                            img_pil = Image.open(BytesIO(img_file_open.read()))
-                            # print(img_np)
-                            img_pil.save(out_path_images / img_file_name)
-                            datapoint["image"] = {
-                                "path": str(out_path_images / img_file_name),
-                                "bytes": img_file_open.read(),
-                            }
+                            with open(img_file_writepath, "wb") as img_write:
+                                shutil.copyfileobj(img_file_open, img_write)
+                        datapoint["image"] = str(img_file_writepath)
 
                         # TODO shared augraphy handler
 
@@ -363,7 +364,7 @@ class WSLayoutLMFormatter(mp.Process):
                             image=datapoint["image"],
                         )
                         # print(datapoint_formatted)
-                        out_q.put(datapoint_formatted)
+                        datapoint_batch.append(datapoint_formatted)
 
                         # check if label already exists --> may not need to overwrite
                         # TODO
@@ -407,6 +408,10 @@ class WSLayoutLMFormatter(mp.Process):
                         print(e)
                         continue
 
+            if len(datapoint_batch) > 0:
+                out_q.put(datapoint_batch)
+                datapoint_batch = []
+
     def run(self):
         r"""
         Create dataset, depending on LayoutLM settings
@@ -83,9 +83,16 @@ def do_merge(level: str, meta_dir: pathlib.Path):
     print(f"start generating {level}-level metadata file; "
           f"saving to {full_df_fp}")
 
+    # parquet flushes run on a single background thread so that they do not
+    # stall consuming results from the process pool; waiting on the previous
+    # flush before submitting the next one preserves the append order.
+    pending_write = None
+
     with concurrent.futures.ProcessPoolExecutor(
             max_workers=joblib.cpu_count() - 1
-    ) as executor:
+    ) as executor, concurrent.futures.ThreadPoolExecutor(
+        max_workers=1
+    ) as io_pool:
         for part_df in (pbar := tqdm(
                 executor.map(_to_dataframe, meta_files),
                 total=len(meta_files)
@@ -94,7 +101,10 @@ def do_merge(level: str, meta_dir: pathlib.Path):
             rows_in_mem = len(full_df)
 
             if rows_in_mem > MAX_ROWS_IN_MEM:
-                full_df.to_parquet(
+                if pending_write is not None:
+                    pending_write.result()
+                pending_write = io_pool.submit(
+                    full_df.to_parquet,
                     path=full_df_fp, append=append, engine="fastparquet"
                 )
                 pbar.set_postfix_str(
@@ -103,6 +113,9 @@ def do_merge(level: str, meta_dir: pathlib.Path):
                 append = True
                 full_df = pd.DataFrame(columns=full_df.columns)
 
+        if pending_write is not None:
+            pending_write.result()
+
     if len(full_df) > 0:
         full_df.to_parquet(
             path=full_df_fp, append=append, engine="fastparquet"
@@ -1,8 +1,10 @@
 import argparse
 import concurrent.futures
 import joblib
-import pandas as pd
 import pathlib
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 from tqdm import tqdm
 
 MAX_ROWS_IN_MEM = 100_000
@@ -15,10 +17,6 @@ def get_args():
     return args
 
 
-def _load_parquet(meta_fp: pathlib.Path):
-    return pd.read_parquet(meta_fp)
-
-
 def main():
     args = get_args()
     data_dir = pathlib.Path(args.meta_dir)
@@ -28,37 +26,34 @@ def main():
 
     print("Found", len(meta_files), "source meta files")
 
-    full_df = pd.DataFrame()
     full_df_fp = data_dir.parent / f"sources_{dump_id}.meta.parquet"
 
-    append = False
-
-    with concurrent.futures.ProcessPoolExecutor(
-            max_workers=joblib.cpu_count() - 2
-    ) as executor:
-        for part_df in (pbar := tqdm(
-                executor.map(_load_parquet, meta_files),
-                total=len(meta_files)
+    # arrow parallelizes the scan internally; keep the same headroom as the
+    # previous process pool
+    pa.set_cpu_count(max(1, joblib.cpu_count() - 2))
+
+    dataset = ds.dataset(
+        [str(fp) for fp in meta_files], format="parquet"
+    )
+
+    # stream record batches straight into a single parquet file. Writes are
+    # handed to a single background thread, so that encoding and flushing a
+    # batch overlaps with scanning the next one; waiting on the previous write
+    # before submitting keeps batches in order and bounds memory to two
+    # batches.
+    with pq.ParquetWriter(str(full_df_fp), schema=dataset.schema) as writer, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=1) as io_pool:
+        pending_write = None
+        for batch in (pbar := tqdm(
+                dataset.to_batches(batch_size=MAX_ROWS_IN_MEM)
         )):
-            full_df = pd.concat([full_df, part_df], ignore_index=True)
-            rows_in_mem = len(full_df)
-
-            if rows_in_mem > MAX_ROWS_IN_MEM:
-                full_df.to_parquet(
-                    path=full_df_fp, append=append, engine="fastparquet"
-                )
-                pbar.set_postfix_str(
-                    f"wrote to {full_df_fp} with append={append}"
-                )
-                append = True
-                full_df = pd.DataFrame(columns=full_df.columns)
-
-    if len(full_df) > 0:
-        full_df.to_parquet(
-            path=full_df_fp, append=append, engine="fastparquet"
-        )
+            if pending_write is not None:
+                pending_write.result()
+            pending_write = io_pool.submit(writer.write_batch, batch)
+            pbar.set_postfix_str(f"wrote {batch.num_rows} rows")
 
-    del full_df
+        if pending_write is not None:
+            pending_write.result()
 
 
 if __name__ == '__main__':
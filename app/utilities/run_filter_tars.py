@@ -4,7 +4,6 @@ import tarfile
 import multiprocessing as mp
 import json
 from typing import List, Tuple, Union
-from pathlib import Path
 
 import joblib
 
@@ -12,11 +11,20 @@ parser = argparse.ArgumentParser()
 parser.add_argument("--data_root", type=str, default=None)
 args = parser.parse_args()
 
+# copy members in 1MiB chunks instead of tarfile's default 16KiB
+TAR_COPY_BUFSIZE = 1024 * 1024
+
 
 def get_page_id(fn: str) -> str:
     return fn[fn.find("doc_"):].replace("doc_", "")
 
 
+def get_member_page_id(name: str) -> str:
+    # same as get_page_id(Path(name).stem), without building a Path
+    stem = name.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    return get_page_id(stem)
+
+
 def filter_tar_file(
         inputs: Tuple[pathlib.Path, List[str]]
 ) -> Union[int, None]:
@@ -28,25 +36,31 @@ def filter_tar_file(
     filtered_tar_fp = src_tar_fp.parent / filtered_tar_fn
 
     src_tar = tarfile.open(src_tar_fp, 'r:gz')
-    tgt_tar = tarfile.open(filtered_tar_fp, 'w:gz')
+    tgt_tar = tarfile.open(
+        filtered_tar_fp, 'w:gz', copybufsize=TAR_COPY_BUFSIZE
+    )
 
     try:
-        all_jpg_members = set(
-            get_page_id(Path(mem.name).stem) for mem in src_tar.getmembers()
-            if mem.name.endswith(".jpg")
-        )
-        all_txt_members = set(
-            get_page_id(Path(mem.name).stem) for mem in src_tar.getmembers()
-            if mem.name.startswith("text_doc_")
-        )
-        all_ent_members = set(
-            get_page_id(Path(mem.name).stem) for mem in src_tar.getmembers()
-            if mem.name.startswith("entities_doc_")
-        )
-        all_wrd_members = set(
-            get_page_id(Path(mem.name).stem) for mem in src_tar.getmembers()
-            if mem.name.startswith("words_doc_")
-        )
+        # compute the page id of every member once
+        member_info = [
+            (mem, get_member_page_id(mem.name))
+            for mem in src_tar.getmembers()
+        ]
+
+        all_jpg_members = set()
+        all_txt_members = set()
+        all_ent_members = set()
+        all_wrd_members = set()
+        for mem, page_id in member_info:
+            name = mem.name
+            if name.endswith(".jpg"):
+                all_jpg_members.add(page_id)
+            if name.startswith("text_doc_"):
+                all_txt_members.add(page_id)
+            elif name.startswith("entities_doc_"):
+                all_ent_members.add(page_id)
+            elif name.startswith("words_doc_"):
+                all_wrd_members.add(page_id)
 
         all_page_ids = all_jpg_members & all_txt_members \
                        & all_ent_members & all_wrd_members
@@ -55,17 +69,13 @@ def filter_tar_file(
 
         # write all matching members to target tar
         num_files = 0
-        for mem in src_tar.getmembers():
+        for mem, page_id in member_info:
             num_files += 1
-            page_id = get_page_id(Path(mem.name).stem)
             if page_id not in filtered_pages:
                 continue
 
-            fobj = src_tar.extractfile(mem)
-            fobj.seek(0)
-
-            # write to target tar
-            tgt_tar.addfile(mem, fobj)
+            # write to target tar; addfile copies exactly mem.size bytes
+            tgt_tar.addfile(mem, src_tar.extractfile(mem))
 
     except Exception as e:
         print("Error processing: ", src_tar_fp)
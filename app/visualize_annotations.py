@@ -1,15 +1,13 @@
 import argparse
 import cv2
-import json
 import math
 import numpy as np
+import orjson
 import pathlib
 import ray
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Tuple
 
 import settings
-from src.annotation.annotation_objects import BoundingBox, Entity
-from src.annotation.utils import hsv_to_bgr
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--annotations_dir", default=None, type=str)
@@ -18,34 +16,50 @@ parser.add_argument("--entity_ids", nargs="+", default=None, type=int,
                     help="List of entity ids to visualize (default: all).")
 args = parser.parse_args()
 
+# entity ids selected for drawing (None means all)
+ALLOWED_ENTITY_IDS = (
+    None if args.entity_ids is None else frozenset(args.entity_ids)
+)
 
-def draw_bounding_boxes(src_fp, save_as, entities: Dict[int, List[Entity]]):
-    img = cv2.imread(src_fp)
+# exclude table rows and columns to avoid clutter in case we are visualizing
+# all entities
+BLOCKED_ENTITY_IDS = frozenset([
+    settings.entities.ENTITY_TABLE_ROW_ID,
+    settings.entities.ENTITY_TABLE_HEADER_ROW_ID,
+    settings.entities.ENTITY_TABLE_COLUMN_ID
+])
+
+# bgr drawing colors indexed by entity id, converted in one call
+ENTITY_PALETTE_BGR = cv2.cvtColor(
+    settings.colors.ENTITY_PALETTE[np.newaxis], cv2.COLOR_HSV2BGR
+)[0]
+
+
+def draw_bounding_boxes(
+        src_fp, save_as, entities: Dict[str, List[Dict[str, Any]]]
+):
+    # the page is decoded lazily, so pages without any entity to draw are
+    # never decoded
+    img = None
     num_matches = 0
 
     for entity_id, entity_list in entities.items():
+        entity_id = int(entity_id)
         if (
-                args.entity_ids is not None
-                and
-                int(entity_id) not in args.entity_ids
-        ):
+                ALLOWED_ENTITY_IDS is not None
+                and entity_id not in ALLOWED_ENTITY_IDS
+        ) or entity_id in BLOCKED_ENTITY_IDS:
             continue
 
-        # exclude table rows and columns to avoid clutter in case we are
-        # visualizing all entities
-        if int(entity_id) in [
-            settings.entities.ENTITY_TABLE_ROW_ID,
-            settings.entities.ENTITY_TABLE_HEADER_ROW_ID,
-            settings.entities.ENTITY_TABLE_COLUMN_ID
-        ]:
-            continue
+        color_bgr = tuple(ENTITY_PALETTE_BGR[entity_id].tolist())
+        entity_name = settings.entities.ENTITY_ID_TO_NAME[entity_id]
+
+        if img is None and len(entity_list) > 0:
+            img = cv2.imread(src_fp)
 
-        color_hsv = settings.colors.ENTITY_CATEGORY_ID_TO_COLOR[int(entity_id)]
-        color_rgb = hsv_to_bgr(color_hsv)
-        entity_name = settings.entities.ENTITY_ID_TO_NAME[int(entity_id)]
         for entity in entity_list:
-            bbox = entity.bbox
-            img = draw_bbox(img, bbox, color_rgb, tag=entity_name,
+            bbox = entity["bbox"]
+            img = draw_bbox(img, bbox, color_bgr, tag=entity_name,
                             alpha=0.8)
 
             num_matches += 1
@@ -56,7 +70,7 @@ def draw_bounding_boxes(src_fp, save_as, entities: Dict[int, List[Entity]]):
 
 def draw_bbox(
         img: np.ndarray,
-        bbox: BoundingBox,
+        bbox: Dict[str, float],
         bgr_color: Tuple[int, int, int],
         tag: str = None,
         alpha: float = 0.4,
@@ -65,7 +79,7 @@ def draw_bbox(
     r"""Draws a bounding box on an image.
 
     @param img: image
-    @param bbox: bounding box
+    @param bbox: bounding box as dict with keys x, y, width and height
     @param bgr_color: color of the bounding box
     @param tag: tag to be displayed in the bounding box
     @param alpha: transparency of the bounding box
@@ -74,8 +88,10 @@ def draw_bbox(
     @return: image with bounding box
     """
     # get bounding box coordinates
-    top_left = (bbox.x - 2, bbox.y - 2)
-    bottom_right = (bbox.x + bbox.width + 2, bbox.y + bbox.height + 2)
+    x, y = bbox["x"], bbox["y"]
+    width, height = bbox["width"], bbox["height"]
+    top_left = (x - 2, y - 2)
+    bottom_right = (x + width + 2, y + height + 2)
 
     # draw bounding box
     img = cv2.rectangle(
@@ -103,24 +119,39 @@ def draw_bbox(
         return img
 
     # Create a mask of the bounding box
-    x_start = max(0, int(bbox.x))
-    x_end = int(bbox.x + bbox.width)
-    y_start = max(0, int(bbox.y))
-    y_end = int(bbox.y + bbox.height)
+    x_start = max(0, int(x))
+    x_end = int(x + width)
+    y_start = max(0, int(y))
+    y_end = int(y + height)
 
     sub_img = img[y_start:y_end, x_start:x_end]
-    rect = np.ones_like(sub_img) * np.array(bgr_color, dtype=np.uint8)
-    res = cv2.addWeighted(sub_img, alpha, rect, 1 - alpha, 1.0)
 
-    try:
-        img[y_start:y_end, x_start:x_end] = res
-    except TypeError:
-        pass
+    if sub_img.size == 0:
+        return img
+
+    # blend in place: sub_img * alpha + color * (1 - alpha) + 1.0; the color
+    # term is a 3-vector broadcast over the box, so no solid-color rectangle
+    # needs to be materialized
+    color_term = (1 - alpha) * np.array(bgr_color, dtype=np.float32) + 1.0
+    blended = np.multiply(sub_img, alpha, dtype=np.float32)
+    blended += color_term
+    np.clip(blended, 0, 255, out=blended)
+    np.rint(blended, out=blended)
+    sub_img[...] = blended
 
     return img
 
 
+def load_entities(entities_fp: pathlib.Path) -> Dict[str, List[Dict]]:
+    # drawing only needs the bounding boxes, so we keep the raw dicts
+    # instead of building Entity objects
+    with open(entities_fp, "rb") as f:
+        return orjson.loads(f.read())["entities"]
+
+
 def page_iterator(annotations_dir: pathlib.Path, subset_size: int):
+    r"""Yields pairs of (entities json path, page image path). Parsing the
+    json is left to the ray workers, so that the driver only lists files."""
     for i, fp in enumerate(annotations_dir.rglob(pattern="*.json")):
         if not str(fp.name).startswith("entities"):
             continue
@@ -131,26 +162,12 @@ def page_iterator(annotations_dir: pathlib.Path, subset_size: int):
         if i >= subset_size >= 0:
             break
 
-        with open(fp, "r") as f:
-            entities = json.load(f)["entities"]
-
-        entities = {
-            cat_id: [Entity(
-                doc_id=e["doc_id"],
-                page_id=e["page_id"],
-                page_num=e["page_num"],
-                entity_category=e["entity_category"],
-                bbox=BoundingBox(**e["bbox"])
-            ) for e in entity_list]
-            for cat_id, entity_list in entities.items()
-        }
-
-        yield entities, img_fp
+        yield fp, img_fp
 
 
 @ray.remote
 def visualize_page(
-        entities: Dict[int, List[Entity]],
+        entities_fp: pathlib.Path,
         page_img_fp: pathlib.Path,
         target_dir: pathlib.Path
 ):
@@ -160,7 +177,7 @@ def visualize_page(
     draw_bounding_boxes(
         src_fp=str(page_img_fp),
         save_as=str(debug_save_as),
-        entities=entities,
+        entities=load_entities(entities_fp),
     )
     print("processed page", page_img_fp.name)
 
@@ -174,8 +191,8 @@ def main():
 
     # send to workers
     ray.get([
-        visualize_page.remote(page_annotation, page_img_fp, target_dir)
-        for page_annotation, page_img_fp in page_iterator(
+        visualize_page.remote(entities_fp, page_img_fp, target_dir)
+        for entities_fp, page_img_fp in page_iterator(
             annotations_dir=pathlib.Path(args.annotations_dir),
             subset_size=args.subset_size
         )